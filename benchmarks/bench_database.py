@@ -0,0 +1,173 @@
+"""Мікробенчмарки bot_database на великих згенерованих базах.
+
+Приклад:
+    python benchmarks/bench_database.py --rows 1000000 --output results.json
+    python benchmarks/compare.py before.json after.json
+
+Дані генеруються детерміновано з `--seed`: розподіл нагадувань між чатами
+скошений (кілька «важких» чатів і довгий хвіст), більшість рядків уже надіслані.
+Усе працює офлайн у тимчасовій базі, реальна база бота не зачіпається.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "benchmark")
+
+import bot_database as database
+from bot_config import TIMEZONE
+
+INSERT_CHUNK = 10000
+DAY = 86400
+WORDS = (
+    "купити", "молоко", "хліб", "зателефонувати", "мамі", "лікар", "зустріч", "звіт", "оплатити",
+    "рахунок", "тренування", "ліки", "квитки", "подарунок", "машина", "сервіс", "книга", "урок",
+)
+SQL_INSERT_GENERATED = "INSERT INTO reminders (chat_id, reminder_time, reminder_text, status) VALUES (?, ?, ?, ?)"
+
+def pick_chat(rng: random.Random, chats: int) -> int:
+    """Лог-рівномірний розподіл: чати з малими номерами отримують значно більше нагадувань."""
+    return int(chats ** rng.random())
+
+def generate_rows(rows: int, chats: int, sent_ratio: float, due_ratio: float, seed: int, now: int):
+    rng = random.Random(seed)
+    for i in range(rows):
+        chat_id = pick_chat(rng, chats)
+        text = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}"
+        if rng.random() < sent_ratio:
+            yield chat_id, now - rng.randrange(60, 30 * DAY), text, "sent"
+        elif rng.random() < due_ratio:
+            yield chat_id, now - rng.randrange(1, 600), text, "pending"
+        else:
+            yield chat_id, now + rng.randrange(60, 90 * DAY), text, "pending"
+
+def populate(args, now: int):
+    started = time.perf_counter()
+    rows = generate_rows(args.rows, args.chats, args.sent_ratio, args.due_ratio, args.seed, now)
+    with database._get_manager().writer() as conn:
+        while True:
+            chunk = [row for _, row in zip(range(INSERT_CHUNK), rows)]
+            if not chunk:
+                break
+            conn.executemany(SQL_INSERT_GENERATED, chunk)
+    with database._get_manager().writer() as conn:
+        conn.execute("ANALYZE")
+    print(f"Згенеровано {args.rows} рядків за {time.perf_counter() - started:.1f} с")
+
+def percentile(samples: list, fraction: float) -> float:
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+def summarize(samples: list) -> dict:
+    """Кількість, ops/sec і перцентилі для списку тривалостей у секундах."""
+    samples = sorted(samples)
+    if not samples:
+        return {"ops": 0}
+    total = sum(samples)
+    return {
+        "ops": len(samples),
+        "ops_per_sec": round(len(samples) / total, 2) if total else None,
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 4),
+        "p90_ms": round(percentile(samples, 0.90) * 1000, 4),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 4),
+        "max_ms": round(samples[-1] * 1000, 4),
+    }
+
+def measure(name: str, operation, inputs: list, results: dict):
+    samples = []
+    for value in inputs:
+        started = time.perf_counter()
+        operation(value)
+        samples.append(time.perf_counter() - started)
+    results[name] = summarize(samples)
+    print(f"{name:<40} {results[name]['ops_per_sec']:>12} оп/с   p50 {results[name]['p50_ms']:.3f} мс   "
+          f"p99 {results[name]['p99_ms']:.3f} мс")
+
+def cold_pending(chat_id: int):
+    database.cache.invalidate(chat_id)
+    database.get_pending_reminders(chat_id)
+
+def run_benchmarks(args, now: int) -> dict:
+    rng = random.Random(args.seed + 1)
+    chats = [pick_chat(rng, args.chats) for _ in range(args.ops)]
+    with database._get_manager().reader() as conn:
+        pending_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM reminders WHERE status = 'pending' ORDER BY id LIMIT ?", (args.ops * 10,)
+        )]
+    rng.shuffle(pending_ids)
+    future = datetime.fromtimestamp(now, TIMEZONE) + timedelta(days=1)
+
+    results = {}
+    measure("get_pending_reminders[cold]", cold_pending, chats, results)
+    database.cache.clear()
+    for chat_id in chats:
+        database.get_pending_reminders(chat_id)
+    measure("get_pending_reminders[warm]", database.get_pending_reminders, chats, results)
+    database.cache.clear()
+    measure("get_pending_reminders_page", database.get_pending_reminders_page, chats, results)
+    words = [rng.choice(WORDS)[:4] for _ in chats]
+    measure("search_reminders", lambda item: database.search_reminders(*item), list(zip(chats, words)), results)
+    scans = max(args.ops // 20, 5)
+    measure("get_all_pending_reminders_for_check", lambda _: database.get_all_pending_reminders_for_check(),
+            range(scans), results)
+    measure("add_reminder_to_db",
+            lambda chat_id: database.add_reminder_to_db(chat_id, future, "Бенчмарк"), chats, results)
+    measure("mark_reminder_sent", database.mark_reminder_sent, pending_ids[:args.ops], results)
+    return results
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки bot_database")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--chats", type=int, default=10000)
+    parser.add_argument("--sent-ratio", type=float, default=0.8)
+    parser.add_argument("--due-ratio", type=float, default=0.001)
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default=None, help="каталог для тимчасової бази")
+    parser.add_argument("--output", default=None, help="файл для JSON-результатів")
+    args = parser.parse_args()
+
+    now = int(time.time())
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        database.DB_NAME = os.path.join(workdir, "bench.db")
+        database.init_db()
+        try:
+            populate(args, now)
+            results = run_benchmarks(args, now)
+        finally:
+            database.close_db()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "created": datetime.now(TIMEZONE).isoformat(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "params": {key: value for key, value in vars(args).items() if key not in ("workdir", "output")},
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as target:
+            json.dump(report, target, indent=2, ensure_ascii=False)
+        print(f"Результати збережено у {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Порівнює два JSON-звіти bench_database.py.
+
+    python benchmarks/compare.py before.json after.json --threshold 10
+
+Код виходу 1, якщо пропускна здатність або p99 будь-якої операції погіршились
+більше ніж на `--threshold` відсотків.
+"""
+import argparse
+import json
+import sys
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as source:
+        return json.load(source)
+
+def change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+def compare(before: dict, after: dict, threshold: float) -> list:
+    regressions = []
+    print(f"{'операція':<40} {'оп/с до':>12} {'оп/с після':>12} {'Δ%':>8} {'p99 до':>10} {'p99 після':>10} {'Δ%':>8}")
+    for name, old in before["results"].items():
+        new = after["results"].get(name)
+        if new is None:
+            print(f"{name:<40} відсутня у другому звіті")
+            continue
+        throughput = change(old["ops_per_sec"], new["ops_per_sec"])
+        latency = change(old["p99_ms"], new["p99_ms"])
+        marker = ""
+        if throughput < -threshold or latency > threshold:
+            regressions.append(name)
+            marker = "  ← регресія"
+        print(f"{name:<40} {old['ops_per_sec']:>12} {new['ops_per_sec']:>12} {throughput:>+8.1f} "
+              f"{old['p99_ms']:>10.3f} {new['p99_ms']:>10.3f} {latency:>+8.1f}{marker}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Порівняння результатів бенчмарків")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="допустиме погіршення, %%")
+    args = parser.parse_args()
+
+    before, after = load(args.before), load(args.after)
+    if before["meta"]["params"] != after["meta"]["params"]:
+        print("Увага: звіти отримано з різними параметрами генерації.")
+    regressions = compare(before, after, args.threshold)
+    if regressions:
+        print(f"Регресії: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
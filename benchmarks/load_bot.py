@@ -0,0 +1,307 @@
+"""Навантажувальний прогін усього бота з симульованими користувачами.
+
+Приклад:
+    python benchmarks/load_bot.py --users 2000 --reminders 5000 --output load.json
+
+Будується справжній Application з bot_main.build_application, але замість
+Telegram відповідає локальний FakeRequest із заданою затримкою. Кожен
+користувач проходить /set (по черзі всі гілки, зокрема точну дату з
+помилковим першим введенням), /list і /delete, чекаючи відповіді бота на
+кожен крок. Паралельно планувальник доставляє заздалегідь створені
+нагадування, і для них рахується затримка доставки: час надсилання мінус
+reminder_time.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_database import git_commit, summarize
+from telegram import Update
+from telegram.request import BaseRequest
+
+import bot_database as database
+import bot_handlers as handlers
+import bot_metrics as metrics
+from bot_config import TIMEZONE
+from bot_delivery import DeliveryPipeline, format_reminder
+from bot_main import build_application
+from bot_scheduler import ReminderScheduler
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Bot", "username": "reminder_bot"}
+USER_CHAT_BASE = 1_000_000
+DELIVERY_CHAT_BASE = 2_000_000
+DELIVERY_PREFIX = format_reminder("load:")
+REPLY_TIMEOUT = 60
+LOOP_PROBE_INTERVAL = 0.05
+
+SET_BRANCHES = (
+    ("1_min",),
+    ("1_hour",),
+    ("custom_time", "in_minutes", "30"),
+    ("custom_time", "in_hours", "5"),
+    ("custom_time", "in_days", "2"),
+    ("custom_time", "specific_date", "01.01.2000 10:00", "specific_date"),
+    ("custom_time", "recurring", "2h"),
+)
+
+class FakeRequest(BaseRequest):
+    """Локальна заміна Bot API: відповіді складаються в черги чатів, доставки - у журнал."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.replies = defaultdict(asyncio.Queue)
+        self.deliveries = []
+        self.message_id = 0
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        endpoint = url.rsplit("/", 1)[-1]
+        params = request_data.parameters if request_data is not None else {}
+        result = True
+        if endpoint == "getMe":
+            result = BOT_USER
+        elif endpoint in ("sendMessage", "editMessageText"):
+            chat_id = int(params["chat_id"])
+            text = params.get("text", "")
+            self.message_id += 1
+            if text.startswith(DELIVERY_PREFIX):
+                self.deliveries.append((time.time(), int(text[len(DELIVERY_PREFIX):])))
+            elif not text.startswith(format_reminder("")):
+                self.replies[chat_id].put_nowait(params)
+            result = {
+                "message_id": self.message_id, "date": int(time.time()), "text": text,
+                "chat": {"id": chat_id, "type": "private"}, "from": BOT_USER,
+            }
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+class TimedLock:
+    def __init__(self, lock, samples: list):
+        self._lock = lock
+        self._samples = samples
+
+    def __enter__(self):
+        started = time.perf_counter()
+        self._lock.acquire()
+        self._samples.append(time.perf_counter() - started)
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+
+class LoadRun:
+    def __init__(self, application, request: FakeRequest):
+        self.application = application
+        self.request = request
+        self.update_id = 0
+        self.steps = defaultdict(list)
+        self.handlers = defaultdict(list)
+        self.db_calls = defaultdict(list)
+        self.db_queue_wait = []
+        self.writer_wait = []
+        self.loop_lag = []
+        self.errors = defaultdict(int)
+
+    def instrument(self):
+        metrics.instrument_handlers(self.application, lambda elapsed, name: self.handlers[name].append(elapsed))
+
+        run = database._run
+
+        async def timed_run(func, *args):
+            submitted = time.perf_counter()
+
+            def call():
+                started = time.perf_counter()
+                self.db_queue_wait.append(started - submitted)
+                try:
+                    return func(*args)
+                finally:
+                    self.db_calls[func.__name__].append(time.perf_counter() - started)
+            return await run(call)
+
+        database._run = timed_run
+        manager = database._get_manager()
+        manager._write_lock = TimedLock(manager._write_lock, self.writer_wait)
+
+    async def probe_loop(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(LOOP_PROBE_INTERVAL)
+            self.loop_lag.append(max(time.perf_counter() - started - LOOP_PROBE_INTERVAL, 0))
+
+    def _next_id(self) -> int:
+        self.update_id += 1
+        return self.update_id
+
+    def _message(self, chat_id: int, text: str) -> dict:
+        message = {
+            "message_id": self._next_id(), "date": int(time.time()), "text": text,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": f"User{chat_id}"},
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text)}]
+        return {"update_id": self.update_id, "message": message}
+
+    def _callback(self, chat_id: int, data: str) -> dict:
+        return {"update_id": self._next_id(), "callback_query": {
+            "id": str(self.update_id), "chat_instance": str(chat_id), "data": data,
+            "from": {"id": chat_id, "is_bot": False, "first_name": f"User{chat_id}"},
+            "message": {
+                "message_id": 1, "date": int(time.time()), "text": "...",
+                "chat": {"id": chat_id, "type": "private"}, "from": BOT_USER,
+            },
+        }}
+
+    async def step(self, name: str, chat_id: int, payload: dict) -> dict:
+        started = time.perf_counter()
+        await self.application.update_queue.put(Update.de_json(payload, self.application.bot))
+        reply = await asyncio.wait_for(self.request.replies[chat_id].get(), REPLY_TIMEOUT)
+        self.steps[name].append(time.perf_counter() - started)
+        return reply
+
+    async def simulate_user(self, index: int):
+        chat_id = USER_CHAT_BASE + index
+        branch = SET_BRANCHES[index % len(SET_BRANCHES)]
+        date_text = (datetime.now(TIMEZONE) + timedelta(days=3)).strftime("%d.%m.%Y %H:%M")
+        try:
+            await self.step("/set", chat_id, self._message(chat_id, "/set"))
+            await self.step(f"set:{branch[0]}", chat_id, self._callback(chat_id, branch[0]))
+            if len(branch) > 1:
+                await self.step(f"set:{branch[1]}", chat_id, self._callback(chat_id, branch[1]))
+                if len(branch) > 3:
+                    await self.step("set:invalid_input", chat_id, self._message(chat_id, branch[2]))
+                value = date_text if branch[1] == "specific_date" else branch[2]
+                await self.step("set:value", chat_id, self._message(chat_id, value))
+            await self.step("set:text", chat_id, self._message(chat_id, f"Навантаження {index}"))
+            await self.step("/list", chat_id, self._message(chat_id, "/list"))
+            reply = await self.step("/delete", chat_id, self._message(chat_id, "/delete"))
+            buttons = [button["callback_data"] for row in reply["reply_markup"]["inline_keyboard"]
+                       for button in row if button["callback_data"].startswith("del_")]
+            await self.step("delete:confirm", chat_id, self._callback(chat_id, buttons[0]))
+        except Exception as e:
+            self.errors[type(e).__name__] += 1
+
+def seed_deliveries(count: int, chats: int, start: int, spread: float):
+    per_chat = defaultdict(list)
+    for i in range(count):
+        rem_time = start + int(spread * i / max(count, 1))
+        per_chat[DELIVERY_CHAT_BASE + i % chats].append((rem_time, f"load:{rem_time}", None))
+    for chat_id, rows in per_chat.items():
+        database.add_reminders_bulk(chat_id, rows)
+
+async def run_load(args) -> dict:
+    request = FakeRequest(args.api_latency)
+    application = build_application("123:LOAD", request=request, concurrent_updates=args.concurrency)
+    load = LoadRun(application, request)
+    load.instrument()
+    seed_deliveries(args.reminders, args.delivery_chats, int(time.time()) + 2, args.spread)
+
+    async with application:
+        await application.start()
+        pipeline = DeliveryPipeline(application.bot, global_rate=args.global_rate, worker_id="load")
+        scheduler = ReminderScheduler(pipeline.deliver, "load", sweep_interval=1.0)
+        await scheduler.start()
+        application.bot_data[handlers.SCHEDULER_KEY] = scheduler
+        probe = asyncio.create_task(load.probe_loop())
+
+        started = time.perf_counter()
+        await asyncio.gather(*(load.simulate_user(i) for i in range(args.users)))
+        users_elapsed = time.perf_counter() - started
+        deadline = time.monotonic() + args.spread + args.drain_timeout
+        while len(request.deliveries) < args.reminders and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+
+        probe.cancel()
+        await scheduler.stop()
+        await application.stop()
+
+    lags = [sent_at - rem_time for sent_at, rem_time in request.deliveries]
+    return {
+        "users": {"count": args.users, "elapsed_s": round(users_elapsed, 3), "errors": dict(load.errors)},
+        "steps": {name: summarize(samples) for name, samples in sorted(load.steps.items())},
+        "handlers": {name: summarize(samples) for name, samples in sorted(load.handlers.items())},
+        "db_calls": {name: summarize(samples) for name, samples in sorted(load.db_calls.items())},
+        "db_queue_wait": summarize(load.db_queue_wait),
+        "db_writer_lock_wait": summarize(load.writer_wait),
+        "event_loop_lag": summarize(load.loop_lag),
+        "delivery": {
+            "expected": args.reminders,
+            "delivered": len(request.deliveries),
+            "lag": summarize(lags),
+        },
+    }
+
+def print_section(title: str, rows: dict):
+    print(f"\n{title}")
+    for name, stats in rows.items():
+        if stats.get("ops"):
+            print(f"  {name:<32} n={stats['ops']:<7} p50 {stats['p50_ms']:>9.3f} мс   "
+                  f"p99 {stats['p99_ms']:>9.3f} мс   max {stats['max_ms']:>9.3f} мс")
+
+def main():
+    parser = argparse.ArgumentParser(description="Навантажувальний прогін бота")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent_updates для Application")
+    parser.add_argument("--api-latency", type=float, default=0.05, help="затримка фейкового Bot API, с")
+    parser.add_argument("--reminders", type=int, default=2000, help="нагадувань для доставки під навантаженням")
+    parser.add_argument("--delivery-chats", type=int, default=500)
+    parser.add_argument("--spread", type=float, default=10.0, help="за скільки секунд настають нагадування")
+    parser.add_argument("--global-rate", type=float, default=30.0)
+    parser.add_argument("--drain-timeout", type=float, default=120.0)
+    parser.add_argument("--workdir", default=None)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        database.DB_NAME = os.path.join(workdir, "load.db")
+        database.init_db()
+        try:
+            results = asyncio.run(run_load(args))
+        finally:
+            database.close_db()
+
+    print(f"Користувачів: {args.users} за {results['users']['elapsed_s']} с, помилки: {results['users']['errors']}")
+    print_section("Кроки користувача (від оновлення до відповіді)", results["steps"])
+    print_section("Обробники", results["handlers"])
+    print_section("Виклики бази", results["db_calls"])
+    print_section("Конкуренція", {
+        "черга пулу бази": results["db_queue_wait"],
+        "замок запису": results["db_writer_lock_wait"],
+        "затримка event loop": results["event_loop_lag"],
+    })
+    delivery = results["delivery"]
+    print(f"\nДоставлено {delivery['delivered']}/{delivery['expected']}")
+    print_section("Затримка доставки", {"send - reminder_time": delivery["lag"]})
+
+    if args.output:
+        report = {"meta": {"commit": git_commit(), "params": vars(args)}, "results": results}
+        with open(args.output, "w", encoding="utf-8") as target:
+            json.dump(report, target, indent=2, ensure_ascii=False)
+        print(f"Результати збережено у {args.output}")
+
+if __name__ == "__main__":
+    main()
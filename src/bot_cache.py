@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_CHATS = 10000
+DEFAULT_MAX_ROWS = 200000
+DEFAULT_TTL_SECONDS = 300
+
+class ChatCache:
+    """LRU-кеш результатів читання активних нагадувань, згрупованих по чатах.
+
+    Для кожного чату зберігається словник {ключ запиту: рядки}. Будь-який запис
+    у чат інвалідовує весь його запис. Обмеження - кількість чатів і сумарна
+    кількість рядків, щоб пам'ять не росла разом із кількістю користувачів.
+
+    Записи інших процесів (кілька воркерів на одній базі) цей кеш не бачить,
+    тому перед читанням викликається `validate` з `PRAGMA data_version`:
+    якщо базу змінило інше з'єднання, кеш очищується повністю.
+    """
+
+    def __init__(self, max_chats: int = DEFAULT_MAX_CHATS, max_rows: int = DEFAULT_MAX_ROWS, ttl: float = DEFAULT_TTL_SECONDS):
+        self.max_chats = max_chats
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._rows = 0
+        self._generation = 0
+        self._data_version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def configure(self, max_chats: int = None, max_rows: int = None, ttl: float = None):
+        with self._lock:
+            if max_chats is not None:
+                self.max_chats = max_chats
+            if max_rows is not None:
+                self.max_rows = max_rows
+            if ttl is not None:
+                self.ttl = ttl
+            self._evict()
+
+    def generation(self) -> int:
+        return self._generation
+
+    def validate(self, data_version: int):
+        """Очищує кеш, якщо `data_version` бази змінилася з попередньої перевірки."""
+        with self._lock:
+            if data_version == self._data_version:
+                return
+            if self._data_version is not None:
+                self._generation += 1
+                self.invalidations += 1
+                self._entries.clear()
+                self._rows = 0
+            self._data_version = data_version
+
+    def get(self, chat_id: int, key):
+        with self._lock:
+            entry = self._entries.get(chat_id)
+            if entry is not None and entry[0] < time.monotonic():
+                self._drop(chat_id)
+                entry = None
+            if entry is None or key not in entry[1]:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(chat_id)
+            self.hits += 1
+            return entry[1][key][0]
+
+    def put(self, chat_id: int, key, value, size: int, generation: int):
+        # Значення, прочитане до паралельного запису, вже може бути застарілим.
+        with self._lock:
+            if generation != self._generation or self.max_chats <= 0:
+                return
+            entry = self._entries.get(chat_id)
+            if entry is None:
+                entry = (time.monotonic() + self.ttl, {})
+                self._entries[chat_id] = entry
+            else:
+                self._entries.move_to_end(chat_id)
+            old = entry[1].get(key)
+            if old is not None:
+                self._rows -= old[1]
+            entry[1][key] = (value, size)
+            self._rows += size
+            self._evict()
+
+    def invalidate(self, chat_id: int):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self._drop(chat_id)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._rows = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "chats": len(self._entries),
+                "rows": self._rows,
+            }
+
+    def _drop(self, chat_id: int):
+        entry = self._entries.pop(chat_id, None)
+        if entry is not None:
+            self._rows -= sum(size for _, size in entry[1].values())
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_chats or self._rows > self.max_rows):
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
@@ -1,4 +1,6 @@
 import os
+import re
+import socket
 import pytz
 from dotenv import load_dotenv
 
@@ -13,4 +15,44 @@ if TOKEN is None:
     raise ValueError("Не знайдено TELEGRAM_BOT_TOKEN. Переконайтесь, що у вас є .env файл з цим значенням.")
 
 TIMEZONE_STR = "Europe/Kyiv"
-TIMEZONE = pytz.timezone(TIMEZONE_STR)
\ No newline at end of file
+TIMEZONE = pytz.timezone(TIMEZONE_STR)
+
+CACHE_MAX_CHATS = int(os.getenv("CACHE_MAX_CHATS", "10000"))
+CACHE_MAX_ROWS = int(os.getenv("CACHE_MAX_ROWS", "200000"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+
+WORKER_ID = os.getenv("WORKER_ID", f"{socket.gethostname()}-{os.getpid()}")
+LEASE_SECONDS = int(os.getenv("LEASE_SECONDS", "300"))
+SWEEP_INTERVAL_SECONDS = float(os.getenv("SWEEP_INTERVAL_SECONDS", "60"))
+CATCHUP_AFTER_SECONDS = int(os.getenv("CATCHUP_AFTER_SECONDS", "60"))
+
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", "30"))
+ARCHIVE_SENT_REMINDERS = os.getenv("ARCHIVE_SENT_REMINDERS", "true").lower() in ("1", "true", "yes")
+COMPACTION_INTERVAL_SECONDS = int(os.getenv("COMPACTION_INTERVAL_SECONDS", "3600"))
+COMPACTION_BATCH_SIZE = int(os.getenv("COMPACTION_BATCH_SIZE", "500"))
+COMPACTION_MAX_BATCHES = int(os.getenv("COMPACTION_MAX_BATCHES", "200"))
+VACUUM_PAGES = int(os.getenv("VACUUM_PAGES", "2000"))
+CONVERT_AUTO_VACUUM = os.getenv("CONVERT_AUTO_VACUUM", "false").lower() in ("1", "true", "yes")
+
+UPDATE_MODE = os.getenv("UPDATE_MODE", "polling").lower()
+CONCURRENT_UPDATES = int(os.getenv("CONCURRENT_UPDATES", "32"))
+PERSISTENCE_INTERVAL_SECONDS = float(os.getenv("PERSISTENCE_INTERVAL_SECONDS", "10"))
+CONVERSATION_TTL_SECONDS = int(os.getenv("CONVERSATION_TTL_SECONDS", str(7 * 86400)))
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram")
+WEBHOOK_SECRET_TOKEN = os.getenv("WEBHOOK_SECRET_TOKEN")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+
+if UPDATE_MODE not in ("polling", "webhook"):
+    raise ValueError(f"Невідомий UPDATE_MODE={UPDATE_MODE!r}: очікується polling або webhook.")
+
+if UPDATE_MODE == "webhook":
+    if not WEBHOOK_URL or not WEBHOOK_URL.startswith("https://"):
+        raise ValueError("Для UPDATE_MODE=webhook потрібен WEBHOOK_URL з https://, на який Telegram надсилатиме оновлення.")
+    if not WEBHOOK_SECRET_TOKEN or not re.fullmatch(r"[A-Za-z0-9_-]{1,256}", WEBHOOK_SECRET_TOKEN):
+        raise ValueError("Для UPDATE_MODE=webhook потрібен WEBHOOK_SECRET_TOKEN: 1-256 символів A-Z, a-z, 0-9, _ або -.")
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+ADMIN_IDS = {int(user_id) for user_id in os.getenv("ADMIN_IDS", "").split(",") if user_id.strip()}
@@ -1,14 +1,179 @@
+import asyncio
+import functools
 import sqlite3
 import logging
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 import pytz
 
+import bot_metrics as metrics
+from bot_cache import ChatCache
+
 DB_NAME = "reminders.db"
+READER_POOL_SIZE = 4
+PAGE_SIZE = 10
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+)
+
+SQL_INSERT_REMINDER = "INSERT INTO reminders (chat_id, reminder_time, reminder_text, recurrence) VALUES (?, ?, ?, ?)"
+SQL_SELECT_PENDING = "SELECT id, reminder_time, reminder_text FROM reminders WHERE chat_id = ? AND status = 'pending' ORDER BY reminder_time ASC"
+SQL_SELECT_PAGE = "SELECT id, reminder_time, reminder_text, recurrence, status FROM reminders WHERE chat_id = ? AND status IN ('pending', 'failed') ORDER BY reminder_time ASC, id ASC LIMIT ?"
+SQL_SELECT_PAGE_AFTER = "SELECT id, reminder_time, reminder_text, recurrence, status FROM reminders WHERE chat_id = ? AND status IN ('pending', 'failed') AND (reminder_time, id) > (?, ?) ORDER BY reminder_time ASC, id ASC LIMIT ?"
+SQL_SELECT_PAGE_BEFORE = "SELECT id, reminder_time, reminder_text, recurrence, status FROM reminders WHERE chat_id = ? AND status IN ('pending', 'failed') AND (reminder_time, id) < (?, ?) ORDER BY reminder_time DESC, id DESC LIMIT ?"
+SQL_EXPORT_PENDING = "SELECT id, reminder_time, reminder_text, recurrence FROM reminders WHERE chat_id = ? AND status = 'pending' ORDER BY reminder_time ASC, id ASC"
+SQL_DELETE_REMINDER = "DELETE FROM reminders WHERE id = ? RETURNING chat_id"
+SQL_SELECT_DUE = "SELECT id, chat_id, reminder_text FROM reminders WHERE reminder_time <= ? AND status = 'pending'"
+SQL_MARK_SENT = "UPDATE reminders SET status = 'sent', lease_owner = NULL, lease_until = NULL WHERE id = ?"
+SQL_MARK_SENT_RETURNING = "UPDATE reminders SET status = 'sent', lease_owner = NULL, lease_until = NULL WHERE id = ? RETURNING chat_id"
+SQL_MARK_SENT_LEASED = "UPDATE reminders SET status = 'sent', lease_owner = NULL, lease_until = NULL WHERE id = ? AND status = 'sending' AND lease_owner = ?"
+SQL_MARK_FAILED = "UPDATE reminders SET status = 'failed', lease_owner = NULL, lease_until = NULL WHERE id = ?"
+SQL_MARK_FAILED_LEASED = "UPDATE reminders SET status = 'failed', lease_owner = NULL, lease_until = NULL WHERE id = ? AND status = 'sending' AND lease_owner = ?"
+SQL_RECLAIM_EXPIRED = "UPDATE reminders SET status = 'pending', lease_owner = NULL, lease_until = NULL WHERE status = 'sending' AND lease_until < ? RETURNING chat_id"
+SQL_CLAIM_DUE = """
+    UPDATE reminders SET status = 'sending', lease_owner = ?, lease_until = ?
+    WHERE id IN (
+        SELECT id FROM reminders WHERE status = 'pending' AND reminder_time <= ?
+        ORDER BY reminder_time ASC, id ASC LIMIT ?
+    )
+    RETURNING id, chat_id, reminder_time, reminder_text, recurrence
+"""
+SQL_SELECT_EXPIRED_SENT = "SELECT id FROM reminders WHERE status = 'sent' AND reminder_time < ? ORDER BY reminder_time ASC LIMIT ?"
+SQL_RESCHEDULE_LEASED = "UPDATE reminders SET reminder_time = ?, status = 'pending', attempts = 0, lease_owner = NULL, lease_until = NULL WHERE id = ? AND status = 'sending' AND lease_owner = ?"
+SQL_RESCHEDULE = "UPDATE reminders SET reminder_time = ?, status = 'pending', attempts = 0, lease_owner = NULL, lease_until = NULL WHERE id = ?"
+SQL_EXTEND_LEASE = "UPDATE reminders SET lease_until = ? WHERE id = ? AND status = 'sending' AND lease_owner = ?"
+SQL_RETRY_LATER = """
+    UPDATE reminders SET attempts = attempts + 1,
+        status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE status END,
+        lease_owner = CASE WHEN attempts + 1 >= ? THEN NULL ELSE lease_owner END,
+        lease_until = CASE WHEN attempts + 1 >= ? THEN NULL ELSE ? + ? * (1 << attempts) END
+    WHERE id = ? AND status = 'sending' AND lease_owner = ?
+    RETURNING id, chat_id, status, lease_until
+"""
+SQL_SEARCH = """
+    SELECT r.id, r.reminder_time, r.reminder_text, r.recurrence, r.status
+    FROM reminders_fts JOIN reminders r ON r.id = reminders_fts.rowid
+    WHERE reminders_fts MATCH ? AND r.status IN ('pending', 'failed')
+    ORDER BY bm25(reminders_fts, 0.0, 1.0), r.id LIMIT ? OFFSET ?
+"""
+SQL_LOAD_USER_DATA = "SELECT key, value FROM user_data WHERE user_id = ?"
+SQL_UPSERT_USER_DATA = "INSERT INTO user_data (user_id, key, value) VALUES (?, ?, ?) ON CONFLICT (user_id, key) DO UPDATE SET value = excluded.value"
+SQL_DELETE_USER_DATA_KEY = "DELETE FROM user_data WHERE user_id = ? AND key = ?"
+SQL_DROP_USER_DATA = "DELETE FROM user_data WHERE user_id = ?"
+SQL_DELETE_STALE_CONVERSATIONS = "DELETE FROM conversations WHERE name = ? AND updated_at < ?"
+SQL_LOAD_CONVERSATIONS = "SELECT conv_key, state FROM conversations WHERE name = ?"
+SQL_UPSERT_CONVERSATION = """
+    INSERT INTO conversations (name, conv_key, state, updated_at) VALUES (?, ?, ?, ?)
+    ON CONFLICT (name, conv_key) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at
+"""
+SQL_DELETE_CONVERSATION = "DELETE FROM conversations WHERE name = ? AND conv_key = ?"
+SQL_SELECT_UPCOMING = "SELECT id, reminder_time FROM reminders WHERE status = 'pending' ORDER BY reminder_time ASC, id ASC LIMIT ?"
+SQL_SELECT_UPCOMING_AFTER = "SELECT id, reminder_time FROM reminders WHERE status = 'pending' AND (reminder_time, id) > (?, ?) ORDER BY reminder_time ASC, id ASC LIMIT ?"
+
+class ConnectionManager:
+    """Одне з'єднання для запису, невеликий пул з'єднань для читання і з'єднання-зонд,
+    за яким видно коміти інших процесів."""
+
+    def __init__(self, db_name: str, pool_size: int = READER_POOL_SIZE):
+        self.db_name = db_name
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        self._probe_lock = threading.Lock()
+        self._probe = self._connect()
+        self._probe_seen = self._probe_version()
+        self._external_changes = 0
+        self._readers = queue.LifoQueue()
+        self._all_readers = []
+        for _ in range(pool_size):
+            conn = self._connect()
+            self._all_readers.append(conn)
+            self._readers.put(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_name, check_same_thread=False, cached_statements=256)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def writer(self):
+        with self._write_lock:
+            try:
+                yield self._writer
+                # Власний коміт зонд теж побачить; його враховано заздалегідь, щоб не сприйняти як чужий.
+                with self._probe_lock:
+                    self._check_probe()
+                    self._writer.commit()
+                    self._probe_seen = self._probe_version()
+            except BaseException:
+                self._writer.rollback()
+                raise
+
+    def _probe_version(self) -> int:
+        return self._probe.execute("PRAGMA data_version").fetchone()[0]
+
+    def _check_probe(self):
+        version = self._probe_version()
+        if version != self._probe_seen:
+            self._probe_seen = version
+            self._external_changes += 1
 
-def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("""
+    def data_version(self) -> int:
+        """Лічильник змін бази іншими процесами. Не чекає на `_write_lock`, тож довгий запис не блокує читання з кешу."""
+        with self._probe_lock:
+            self._check_probe()
+            return self._external_changes
+
+    @contextmanager
+    def reader(self):
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def close(self):
+        with self._write_lock:
+            self._writer.close()
+        with self._probe_lock:
+            self._probe.close()
+        for conn in self._all_readers:
+            conn.close()
+        self._all_readers = []
+
+cache = ChatCache()
+metrics.register_cache(cache)
+
+_manager = None
+_manager_lock = threading.Lock()
+_executor = None
+
+def _get_manager() -> ConnectionManager:
+    global _manager
+    manager = _manager
+    if manager is None or manager.db_name != DB_NAME:
+        with _manager_lock:
+            if _manager is None or _manager.db_name != DB_NAME:
+                if _manager is not None:
+                    _manager.close()
+                _manager = ConnectionManager(DB_NAME)
+            manager = _manager
+    return manager
+
+MIGRATIONS = [
+    (
+        """
         CREATE TABLE IF NOT EXISTS reminders (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             chat_id INTEGER NOT NULL,
@@ -16,54 +181,460 @@ def init_db():
             reminder_text TEXT NOT NULL,
             status TEXT DEFAULT 'pending'
         )
-    """)
-    conn.commit()
-    conn.close()
+        """,
+    ),
+    (
+        "CREATE INDEX IF NOT EXISTS idx_reminders_pending_time ON reminders (reminder_time) WHERE status = 'pending'",
+        "CREATE INDEX IF NOT EXISTS idx_reminders_chat_pending ON reminders (chat_id, reminder_time) WHERE status = 'pending'",
+    ),
+    (
+        """
+        CREATE TABLE reminders_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER NOT NULL,
+            reminder_time INTEGER NOT NULL,
+            reminder_text TEXT NOT NULL,
+            status TEXT DEFAULT 'pending'
+        )
+        """,
+        """
+        INSERT INTO reminders_new (id, chat_id, reminder_time, reminder_text, status)
+        SELECT id, chat_id, CAST(strftime('%s', reminder_time) AS INTEGER), reminder_text, status FROM reminders
+        """,
+        "DROP TABLE reminders",
+        "ALTER TABLE reminders_new RENAME TO reminders",
+        "CREATE INDEX idx_reminders_pending_time ON reminders (reminder_time) WHERE status = 'pending'",
+        "CREATE INDEX idx_reminders_chat_pending ON reminders (chat_id, reminder_time) WHERE status = 'pending'",
+    ),
+    (
+        "ALTER TABLE reminders ADD COLUMN lease_owner TEXT",
+        "ALTER TABLE reminders ADD COLUMN lease_until INTEGER",
+        "CREATE INDEX idx_reminders_sending_lease ON reminders (lease_until) WHERE status = 'sending'",
+    ),
+    (
+        """
+        CREATE TABLE IF NOT EXISTS reminders_archive (
+            id INTEGER PRIMARY KEY,
+            chat_id INTEGER NOT NULL,
+            reminder_time INTEGER NOT NULL,
+            reminder_text TEXT NOT NULL,
+            status TEXT NOT NULL,
+            archived_at INTEGER NOT NULL
+        )
+        """,
+        "CREATE INDEX idx_reminders_sent_time ON reminders (reminder_time) WHERE status = 'sent'",
+    ),
+    (
+        "ALTER TABLE reminders ADD COLUMN recurrence TEXT",
+    ),
+    (
+        # Безконтентна таблиця лише з ненадісланими рядками; `chat` - токен чату, тож MATCH
+        # перетинає короткий список рядків чату зі списком слова, а не фільтрує всі збіги.
+        """
+        CREATE VIRTUAL TABLE reminders_fts USING fts5(
+            chat, reminder_text, content='', tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER reminders_fts_insert AFTER INSERT ON reminders WHEN new.status != 'sent' BEGIN
+            INSERT INTO reminders_fts (rowid, chat, reminder_text)
+            VALUES (new.id, 'c' || replace(new.chat_id, '-', 'n'), new.reminder_text);
+        END
+        """,
+        """
+        CREATE TRIGGER reminders_fts_delete AFTER DELETE ON reminders WHEN old.status != 'sent' BEGIN
+            INSERT INTO reminders_fts (reminders_fts, rowid, chat, reminder_text)
+            VALUES ('delete', old.id, 'c' || replace(old.chat_id, '-', 'n'), old.reminder_text);
+        END
+        """,
+        """
+        CREATE TRIGGER reminders_fts_update AFTER UPDATE OF chat_id, reminder_text, status ON reminders
+        WHEN (old.status = 'sent') != (new.status = 'sent')
+            OR old.chat_id != new.chat_id OR old.reminder_text != new.reminder_text
+        BEGIN
+            INSERT INTO reminders_fts (reminders_fts, rowid, chat, reminder_text)
+            SELECT 'delete', old.id, 'c' || replace(old.chat_id, '-', 'n'), old.reminder_text
+            WHERE old.status != 'sent';
+            INSERT INTO reminders_fts (rowid, chat, reminder_text)
+            SELECT new.id, 'c' || replace(new.chat_id, '-', 'n'), new.reminder_text
+            WHERE new.status != 'sent';
+        END
+        """,
+        """
+        INSERT INTO reminders_fts (rowid, chat, reminder_text)
+        SELECT id, 'c' || replace(chat_id, '-', 'n'), reminder_text FROM reminders WHERE status != 'sent'
+        """,
+    ),
+    (
+        """
+        CREATE TABLE user_data (
+            user_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            value BLOB NOT NULL,
+            PRIMARY KEY (user_id, key)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE conversations (
+            name TEXT NOT NULL,
+            conv_key TEXT NOT NULL,
+            state BLOB NOT NULL,
+            updated_at INTEGER NOT NULL,
+            PRIMARY KEY (name, conv_key)
+        ) WITHOUT ROWID
+        """,
+    ),
+    (
+        # 'failed' - нагадування, яке не вдалося доставити; лишається у списку чату, доки його не видалять.
+        "ALTER TABLE reminders ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0",
+        "CREATE INDEX idx_reminders_chat_listed ON reminders (chat_id, reminder_time) WHERE status IN ('pending', 'failed')",
+    ),
+]
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def enable_incremental_vacuum(conn: sqlite3.Connection, convert: bool = False):
+    """Вмикає auto_vacuum = INCREMENTAL, потрібний для `incremental_vacuum`.
+
+    Нова порожня база перемикається миттєво. Для наявної бази це повний VACUUM, що
+    переписує весь файл і на кількох ГБ блокує запуск на хвилини, тому він виконується
+    лише з `convert` (CONVERT_AUTO_VACUUM=1), а інакше лише пише попередження.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return
+    if conn.execute("SELECT count(*) FROM sqlite_master").fetchone()[0] == 0:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return
+    page_count, page_size = (conn.execute(f"PRAGMA {name}").fetchone()[0] for name in ("page_count", "page_size"))
+    size_mb = page_count * page_size / 2 ** 20
+    if not convert:
+        logging.warning(
+            f"База ({size_mb:.0f} МБ) створена без інкрементального VACUUM: компакція не повертатиме місце на диску. "
+            f"Щоб перетворити її, один раз запустіть бота з CONVERT_AUTO_VACUUM=1 (повний VACUUM, запуск чекатиме на нього)."
+        )
+        return
+    logging.warning(f"Повний VACUUM бази ({size_mb:.0f} МБ) для інкрементального VACUUM, запуск бота чекатиме на нього...")
+    started = time.monotonic()
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    logging.warning(f"Інкрементальний VACUUM увімкнено за {time.monotonic() - started:.1f} с.")
+
+def migrate(manager: ConnectionManager, convert_auto_vacuum: bool = False):
+    with manager.writer() as conn:
+        enable_incremental_vacuum(conn, convert_auto_vacuum)
+        version = get_schema_version(conn)
+    for target in range(version + 1, len(MIGRATIONS) + 1):
+        with manager.writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if get_schema_version(conn) >= target:
+                continue
+            for statement in MIGRATIONS[target - 1]:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {target}")
+        logging.info(f"Схему бази даних оновлено до версії {target}.")
+
+def init_db(convert_auto_vacuum: bool = False):
+    close_db()
+    migrate(_get_manager(), convert_auto_vacuum)
     logging.info("Базу даних ініціалізовано.")
 
-def add_reminder_to_db(chat_id: int, reminder_time: datetime, reminder_text: str):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    time_utc = reminder_time.astimezone(pytz.utc)
-    time_str = time_utc.strftime("%Y-%m-%d %H:%M:%S")
-    cursor.execute(
-        "INSERT INTO reminders (chat_id, reminder_time, reminder_text) VALUES (?, ?, ?)",
-        (chat_id, time_str, reminder_text)
-    )
-    conn.commit()
-    conn.close()
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _manager_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=READER_POOL_SIZE + 1, thread_name_prefix="db")
+    return _executor
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        metrics.DB_LATENCY.observe(time.perf_counter() - started, func.__name__)
+
+async def _run(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(_timed, func, *args))
+
+def close_db():
+    global _manager, _executor
+    cache.clear()
+    with _manager_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+        if _manager is not None:
+            _manager.close()
+            _manager = None
+            logging.info("З'єднання з базою даних закрито.")
+
+def to_db_time(moment: datetime) -> int:
+    return int(moment.timestamp())
+
+def from_db_time(value: int) -> datetime:
+    return datetime.fromtimestamp(value, pytz.utc)
+
+def add_reminder_to_db(chat_id: int, reminder_time: datetime, reminder_text: str, recurrence: str = None) -> int:
+    with _get_manager().writer() as conn:
+        cursor = conn.execute(SQL_INSERT_REMINDER, (chat_id, to_db_time(reminder_time), reminder_text, recurrence))
+    cache.invalidate(chat_id)
+    return cursor.lastrowid
+
+def _cached(chat_id: int, key):
+    cache.validate(_get_manager().data_version())
+    return cache.get(chat_id, key)
 
 def get_pending_reminders(chat_id: int) -> list:
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT id, reminder_time, reminder_text FROM reminders WHERE chat_id = ? AND status = 'pending' ORDER BY reminder_time ASC",
-        (chat_id,)
-    )
-    reminders = cursor.fetchall()
-    conn.close()
+    reminders = _cached(chat_id, "all")
+    if reminders is not None:
+        return reminders
+    generation = cache.generation()
+    with _get_manager().reader() as conn:
+        reminders = conn.execute(SQL_SELECT_PENDING, (chat_id,)).fetchall()
+    cache.put(chat_id, "all", reminders, len(reminders), generation)
     return reminders
 
+def get_pending_reminders_page(chat_id: int, cursor: tuple = None, backwards: bool = False, limit: int = PAGE_SIZE) -> tuple:
+    """Keyset-пагінація за (reminder_time, id). Повертає рядки сторінки та ознаку, чи є ще рядки в цьому напрямку."""
+    key = ("page", cursor, backwards, limit)
+    page = _cached(chat_id, key)
+    if page is not None:
+        return page
+    generation = cache.generation()
+    with _get_manager().reader() as conn:
+        if cursor is None:
+            rows = conn.execute(SQL_SELECT_PAGE, (chat_id, limit + 1)).fetchall()
+        elif backwards:
+            rows = conn.execute(SQL_SELECT_PAGE_BEFORE, (chat_id, *cursor, limit + 1)).fetchall()
+        else:
+            rows = conn.execute(SQL_SELECT_PAGE_AFTER, (chat_id, *cursor, limit + 1)).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+    cache.put(chat_id, key, (rows, has_more), len(rows), generation)
+    return rows, has_more
+
+def iter_pending_reminders(chat_id: int):
+    """Потоково віддає всі активні нагадування чату, не завантажуючи їх у пам'ять разом."""
+    with _get_manager().reader() as conn:
+        yield from conn.execute(SQL_EXPORT_PENDING, (chat_id,))
+
+def add_reminders_bulk(chat_id: int, rows, chunk_size: int = 1000) -> int:
+    """Вставляє (reminder_time, reminder_text, recurrence) порціями executemany в одній транзакції."""
+    inserted = 0
+    with _get_manager().writer() as conn:
+        chunk = []
+        for rem_time, rem_text, recurrence in rows:
+            chunk.append((chat_id, rem_time, rem_text, recurrence))
+            if len(chunk) >= chunk_size:
+                conn.executemany(SQL_INSERT_REMINDER, chunk)
+                inserted += len(chunk)
+                chunk = []
+        if chunk:
+            conn.executemany(SQL_INSERT_REMINDER, chunk)
+            inserted += len(chunk)
+    cache.invalidate(chat_id)
+    return inserted
+
+def fts_query(chat_id: int, text: str) -> str:
+    """Будує безпечний FTS5-запит: кожне слово - префіксна фраза, усі слова обов'язкові."""
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    terms = " AND ".join(f'"{word}"*' for word in words)
+    return f'chat : "c{str(chat_id).replace("-", "n")}" AND reminder_text : ({terms})'
+
+def search_reminders(chat_id: int, text: str, offset: int = 0, limit: int = PAGE_SIZE) -> tuple:
+    """Ранжований (bm25) пошук серед активних нагадувань чату. Повертає рядки та ознаку наступної сторінки."""
+    query = fts_query(chat_id, text)
+    if query is None:
+        return [], False
+    with _get_manager().reader() as conn:
+        rows = conn.execute(SQL_SEARCH, (query, limit + 1, offset)).fetchall()
+    return rows[:limit], len(rows) > limit
+
 def delete_reminder_from_db(reminder_id: int):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM reminders WHERE id = ?", (reminder_id,))
-    conn.commit()
-    conn.close()
+    with _get_manager().writer() as conn:
+        deleted = conn.execute(SQL_DELETE_REMINDER, (reminder_id,)).fetchall()
+    for (chat_id,) in deleted:
+        cache.invalidate(chat_id)
     logging.info(f"Нагадування ID {reminder_id} видалено.")
 
 def get_all_pending_reminders_for_check() -> list:
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    now_utc_str = datetime.now(pytz.utc).strftime("%Y-%m-%d %H:%M:%S")
-    cursor.execute("SELECT id, chat_id, reminder_text FROM reminders WHERE reminder_time <= ? AND status = 'pending'", (now_utc_str,))
-    reminders = cursor.fetchall()
-    conn.close()
-    return reminders
+    now = int(time.time())
+    with _get_manager().reader() as conn:
+        return conn.execute(SQL_SELECT_DUE, (now,)).fetchall()
 
 def mark_reminder_sent(reminder_id: int):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE reminders SET status = 'sent' WHERE id = ?", (reminder_id,))
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    with _get_manager().writer() as conn:
+        updated = conn.execute(SQL_MARK_SENT_RETURNING, (reminder_id,)).fetchall()
+    for (chat_id,) in updated:
+        cache.invalidate(chat_id)
+
+def _chat_ids_for(conn: sqlite3.Connection, reminder_ids: list) -> set:
+    chat_ids = set()
+    for start in range(0, len(reminder_ids), 500):
+        chunk = reminder_ids[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        rows = conn.execute(f"SELECT DISTINCT chat_id FROM reminders WHERE id IN ({placeholders})", chunk)
+        chat_ids.update(chat_id for (chat_id,) in rows)
+    return chat_ids
+
+def mark_reminders_sent(reminder_ids: list, worker_id: str = None, rescheduled: list = (), failed: list = ()):
+    """Фіксує доставку однією транзакцією: разові нагадування стають 'sent',
+    повторювані (`rescheduled` - пари (id, наступний час)) повертаються в 'pending',
+    а ті, що не можна доставити (`failed`), стають 'failed' і більше не надсилаються."""
+    with _get_manager().writer() as conn:
+        chat_ids = _chat_ids_for(conn, list(reminder_ids) + [reminder_id for reminder_id, _ in rescheduled] + list(failed))
+        if worker_id is None:
+            conn.executemany(SQL_MARK_SENT, ((reminder_id,) for reminder_id in reminder_ids))
+            conn.executemany(SQL_RESCHEDULE, ((next_time, reminder_id) for reminder_id, next_time in rescheduled))
+            conn.executemany(SQL_MARK_FAILED, ((reminder_id,) for reminder_id in failed))
+        else:
+            conn.executemany(SQL_MARK_SENT_LEASED, ((reminder_id, worker_id) for reminder_id in reminder_ids))
+            conn.executemany(SQL_RESCHEDULE_LEASED, ((next_time, reminder_id, worker_id) for reminder_id, next_time in rescheduled))
+            conn.executemany(SQL_MARK_FAILED_LEASED, ((reminder_id, worker_id) for reminder_id in failed))
+    for chat_id in chat_ids:
+        cache.invalidate(chat_id)
+
+def claim_due_reminders(worker_id: str, lease_seconds: int, limit: int) -> list:
+    """Атомарно забирає частину нагадувань, час яких настав, під оренду воркера `worker_id`.
+
+    Спершу повертає в 'pending' нагадування з простроченою орендою (воркер впав),
+    тож кожен рядок у будь-який момент належить щонайбільше одному воркеру.
+    Час у базі цілий, тому оренда вважається простроченою лише після повної
+    секунди `lease_until`, інакше вона могла б тривати менше за `lease_seconds`.
+    """
+    now = int(time.time())
+    with _get_manager().writer() as conn:
+        reclaimed = conn.execute(SQL_RECLAIM_EXPIRED, (now,)).fetchall()
+        claimed = conn.execute(SQL_CLAIM_DUE, (worker_id, now + lease_seconds, now, limit)).fetchall()
+    if reclaimed:
+        logging.warning(f"Повернуто {len(reclaimed)} нагадувань з простроченою орендою.")
+    for chat_id in {row[0] for row in reclaimed} | {row[1] for row in claimed}:
+        cache.invalidate(chat_id)
+    claimed.sort(key=lambda row: (row[2], row[0]))
+    return claimed
+
+def extend_leases(reminder_ids: list, worker_id: str, lease_seconds: int):
+    """Подовжує оренду ще не зафіксованих нагадувань воркера, поки триває доставка пачки."""
+    lease_until = int(time.time()) + lease_seconds
+    with _get_manager().writer() as conn:
+        conn.executemany(SQL_EXTEND_LEASE, ((lease_until, reminder_id, worker_id) for reminder_id in reminder_ids))
+
+def schedule_retries(reminder_ids: list, worker_id: str, delay: int, max_attempts: int) -> list:
+    """Відкладає повтор невдалої доставки, подовжуючи оренду на `delay * 2**attempts` секунд.
+
+    Після `max_attempts` спроб нагадування стає 'failed'. Повертає пари (id, час повтору)
+    для тих, що ще будуть повторені.
+    """
+    now = int(time.time())
+    with _get_manager().writer() as conn:
+        rows = [
+            row for reminder_id in reminder_ids
+            for row in conn.execute(SQL_RETRY_LATER, (max_attempts, max_attempts, max_attempts, now, delay, reminder_id, worker_id))
+        ]
+    dead = [row[0] for row in rows if row[2] == 'failed']
+    if dead:
+        logging.error(f"Нагадування ID {dead} не доставлено після {max_attempts} спроб, позначено як 'failed'.")
+    for chat_id in {row[1] for row in rows}:
+        cache.invalidate(chat_id)
+    return [(row[0], row[3]) for row in rows if row[2] != 'failed']
+
+def compact_sent_reminders(older_than: int, batch_size: int, archive: bool = True) -> int:
+    """Переносить в архів (або видаляє) одну порцію надісланих нагадувань, старших за `older_than`."""
+    with _get_manager().writer() as conn:
+        ids = [row[0] for row in conn.execute(SQL_SELECT_EXPIRED_SENT, (older_than, batch_size))]
+        if not ids:
+            return 0
+        placeholders = ",".join("?" * len(ids))
+        if archive:
+            conn.execute(
+                f"INSERT OR REPLACE INTO reminders_archive (id, chat_id, reminder_time, reminder_text, status, archived_at) "
+                f"SELECT id, chat_id, reminder_time, reminder_text, status, ? FROM reminders WHERE id IN ({placeholders})",
+                (int(time.time()), *ids)
+            )
+        conn.execute(f"DELETE FROM reminders WHERE id IN ({placeholders})", ids)
+    return len(ids)
+
+def incremental_vacuum(pages: int) -> int:
+    """Звільняє до `pages` вільних сторінок і повертає, на скільки реально зменшився freelist.
+
+    `execute` робить лише один крок прагми (одну сторінку), тому вона йде через `executescript`.
+    """
+    with _get_manager().writer() as conn:
+        before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
+        after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return before - after
+
+def load_user_data(user_id: int) -> list:
+    with _get_manager().reader() as conn:
+        return conn.execute(SQL_LOAD_USER_DATA, (user_id,)).fetchall()
+
+def load_conversations(name: str, updated_after: int) -> list:
+    """Стани незавершених розмов `name`; ті, що не змінювались з `updated_after`, видаляються."""
+    with _get_manager().writer() as conn:
+        conn.execute(SQL_DELETE_STALE_CONVERSATIONS, (name, updated_after))
+        return conn.execute(SQL_LOAD_CONVERSATIONS, (name,)).fetchall()
+
+def save_persistence(upserts: list, deletes: list, drops: list, conversations: list, ended: list):
+    """Записує накопичені зміни user_data і станів розмов однією транзакцією."""
+    with _get_manager().writer() as conn:
+        conn.executemany(SQL_DROP_USER_DATA, ((user_id,) for user_id in drops))
+        conn.executemany(SQL_DELETE_USER_DATA_KEY, deletes)
+        conn.executemany(SQL_UPSERT_USER_DATA, upserts)
+        conn.executemany(SQL_DELETE_CONVERSATION, ended)
+        conn.executemany(SQL_UPSERT_CONVERSATION, conversations)
+
+def get_upcoming_reminders(after: tuple = None, limit: int = 1000) -> list:
+    with _get_manager().reader() as conn:
+        if after is None:
+            return conn.execute(SQL_SELECT_UPCOMING, (limit,)).fetchall()
+        return conn.execute(SQL_SELECT_UPCOMING_AFTER, (*after, limit)).fetchall()
+
+async def add_reminder(chat_id: int, reminder_time: datetime, reminder_text: str, recurrence: str = None) -> int:
+    return await _run(add_reminder_to_db, chat_id, reminder_time, reminder_text, recurrence)
+
+async def get_reminders_page(chat_id: int, cursor: tuple = None, backwards: bool = False) -> tuple:
+    return await _run(get_pending_reminders_page, chat_id, cursor, backwards)
+
+async def search(chat_id: int, text: str, offset: int = 0) -> tuple:
+    return await _run(search_reminders, chat_id, text, offset)
+
+async def delete_reminder(reminder_id: int):
+    await _run(delete_reminder_from_db, reminder_id)
+
+async def mark_sent_many(reminder_ids: list, worker_id: str = None, rescheduled: list = (), failed: list = ()):
+    await _run(mark_reminders_sent, reminder_ids, worker_id, rescheduled, failed)
+
+async def claim_due(worker_id: str, lease_seconds: int, limit: int) -> list:
+    return await _run(claim_due_reminders, worker_id, lease_seconds, limit)
+
+async def renew_leases(reminder_ids: list, worker_id: str, lease_seconds: int):
+    await _run(extend_leases, reminder_ids, worker_id, lease_seconds)
+
+async def retry_later(reminder_ids: list, worker_id: str, delay: int, max_attempts: int) -> list:
+    return await _run(schedule_retries, reminder_ids, worker_id, delay, max_attempts)
+
+async def compact_sent(older_than: int, batch_size: int, archive: bool = True) -> int:
+    return await _run(compact_sent_reminders, older_than, batch_size, archive)
+
+async def vacuum(pages: int) -> int:
+    return await _run(incremental_vacuum, pages)
+
+async def get_user_data(user_id: int) -> list:
+    return await _run(load_user_data, user_id)
+
+async def get_conversations(name: str, updated_after: int) -> list:
+    return await _run(load_conversations, name, updated_after)
+
+async def save_state(upserts: list, deletes: list, drops: list, conversations: list, ended: list):
+    await _run(save_persistence, upserts, deletes, drops, conversations, ended)
+
+async def get_upcoming(after: tuple = None, limit: int = 1000) -> list:
+    return await _run(get_upcoming_reminders, after, limit)
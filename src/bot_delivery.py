@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+from telegram.helpers import escape_markdown
+
+import bot_database as database
+import bot_metrics as metrics
+from bot_config import TIMEZONE
+from bot_recurrence import next_occurrence
+
+MAX_CONCURRENCY = 20
+GLOBAL_RATE = 30.0
+PRIVATE_CHAT_RATE = 1.0
+GROUP_CHAT_RATE = 20 / 60
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 1.0
+FLUSH_SIZE = 500
+CATCHUP_AFTER_SECONDS = 60
+MAX_MESSAGE_LENGTH = 3500
+SENT, RETRY, DEAD = "sent", "retry", "dead"
+
+def format_reminder(rem_text: str, markdown: bool = True) -> str:
+    if not markdown:
+        return f"🔔 НАГАДУВАННЯ 🔔\n\n{rem_text}"
+    return f"🔔 *НАГАДУВАННЯ* 🔔\n\n{rem_text}"
+
+def format_catchup_line(rem_time: int, rem_text: str, markdown: bool = True) -> str:
+    # Текст екранується: інакше розмітка одного нагадування (або `_` з різних рядків) ламає все повідомлення.
+    moment = datetime.fromtimestamp(rem_time, TIMEZONE).strftime('%d.%m.%Y %H:%M')
+    if not markdown:
+        return f"• {moment} {rem_text}"
+    return f"• `{moment}` {escape_markdown(rem_text, version=1)}"
+
+def format_catchup(reminders: list, markdown: bool = True) -> str:
+    lines = "\n".join(format_catchup_line(reminder[2], reminder[3], markdown) for reminder in reminders)
+    title = "*ПРОПУЩЕНІ НАГАДУВАННЯ*" if markdown else "ПРОПУЩЕНІ НАГАДУВАННЯ"
+    return f"🔔 {title} ({len(reminders)}) 🔔\n\n{lines}"
+
+def format_message(reminders: list, markdown: bool = True) -> str:
+    if len(reminders) == 1:
+        return format_reminder(reminders[0][3], markdown)
+    return format_catchup(reminders, markdown)
+
+def is_markup_error(error: BadRequest) -> bool:
+    return "can't parse entities" in error.message.lower()
+
+def coalesce(reminders: list, now: int, catchup_after: int = CATCHUP_AFTER_SECONDS) -> list:
+    """Розбиває нагадування на повідомлення: прострочені більш ніж на `catchup_after`
+    секунд нагадування одного чату об'єднуються (від найстаршого, з обмеженням довжини),
+    решта надсилаються по одному. Повідомлення впорядковані за найстаршим нагадуванням."""
+    messages = []
+    overdue = {}
+    for reminder in sorted(reminders, key=lambda row: (row[2], row[0])):
+        if now - reminder[2] < catchup_after:
+            messages.append([reminder])
+            continue
+        line_length = len(format_catchup_line(reminder[2], reminder[3])) + 1
+        group, length = overdue.get(reminder[1], (None, 0))
+        if group is None or length + line_length > MAX_MESSAGE_LENGTH:
+            group, length = [], 0
+            messages.append(group)
+        group.append(reminder)
+        overdue[reminder[1]] = (group, length + line_length)
+    messages.sort(key=lambda group: (group[0][2], group[0][0]))
+    return messages
+
+class TokenBucket:
+    """Класичний token bucket: `rate` токенів на секунду, не більше `capacity` у запасі."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def is_full(self) -> bool:
+        self._refill(time.monotonic())
+        return self._tokens >= self.capacity
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        self._refill(time.monotonic())
+        self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+class DeliveryPipeline:
+    """Паралельна доставка нагадувань з обмеженням швидкості та пакетною фіксацією статусу."""
+
+    def __init__(self, bot, concurrency: int = MAX_CONCURRENCY, global_rate: float = GLOBAL_RATE, worker_id: str = None,
+                 catchup_after: int = CATCHUP_AFTER_SECONDS):
+        self.bot = bot
+        self.worker_id = worker_id
+        self.catchup_after = catchup_after
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self._chat_buckets = {}
+        self._sent = []
+        self._dead = []
+        self.sent_total = 0
+        self.failed_total = 0
+        self.last_throughput = 0.0
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(GROUP_CHAT_RATE if chat_id < 0 else PRIVATE_CHAT_RATE)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def deliver(self, reminders: list) -> list:
+        """Надсилає нагадування і повертає ті, які варто повторити пізніше.
+
+        Нагадування, які Telegram відхилив остаточно (BadRequest, Forbidden), позначаються 'failed' і не повертаються.
+        """
+        started = time.monotonic()
+        metrics.DISPATCH_QUEUE.inc(len(reminders))
+        messages = coalesce(reminders, int(time.time()), self.catchup_after)
+        results = await asyncio.gather(*(self._deliver_message(message) for message in messages))
+        await self.flush()
+        for message, outcome in zip(messages, results):
+            metrics.DELIVERY_OUTCOMES.inc(outcome, len(message))
+        failed = [reminder for message, outcome in zip(messages, results) if outcome == RETRY for reminder in message]
+        sent = sum(len(message) for message, outcome in zip(messages, results) if outcome == SENT)
+        elapsed = time.monotonic() - started
+        self.last_throughput = sent / elapsed if elapsed > 0 else float(sent)
+        if reminders:
+            metrics.DELIVERY_THROUGHPUT.set(self.last_throughput)
+        self._chat_buckets = {chat_id: bucket for chat_id, bucket in self._chat_buckets.items() if not bucket.is_full}
+        if reminders:
+            logging.info(
+                f"Доставлено {sent}/{len(reminders)} нагадувань {len(messages)} повідомленнями за {elapsed:.2f} с "
+                f"({self.last_throughput:.1f} нагадувань/с)"
+            )
+        return failed
+
+    async def _deliver_message(self, reminders: list) -> str:
+        try:
+            return await self._send_with_retries(reminders)
+        finally:
+            metrics.DISPATCH_QUEUE.inc(-len(reminders))
+
+    async def _send_with_retries(self, reminders: list) -> str:
+        chat_id = reminders[0][1]
+        rem_id = ",".join(str(reminder[0]) for reminder in reminders)
+        text, parse_mode = format_message(reminders), 'Markdown'
+        for attempt in range(MAX_ATTEMPTS):
+            await self._chat_bucket(chat_id).acquire()
+            try:
+                async with self._semaphore:
+                    await self._global_bucket.acquire()
+                    await self.bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode)
+            except RetryAfter as e:
+                metrics.SEND_FAILURES.inc(type(e).__name__)
+                delay = e.retry_after
+                if isinstance(delay, timedelta):
+                    delay = delay.total_seconds()
+                logging.warning(f"Telegram просить зачекати {delay} с перед надсиланням ID {rem_id}")
+                self._global_bucket.pause(delay)
+                continue
+            except (BadRequest, Forbidden) as e:
+                metrics.SEND_FAILURES.inc(type(e).__name__)
+                if parse_mode is not None and isinstance(e, BadRequest) and is_markup_error(e):
+                    logging.warning(f"Telegram не розібрав розмітку ID {rem_id}, надсилаю без форматування: {e}")
+                    text, parse_mode = format_message(reminders, markdown=False), None
+                    continue
+                logging.error(f"Telegram відхилив нагадування ID {rem_id}, повторів не буде: {e}")
+                self.failed_total += len(reminders)
+                self._dead.extend(reminder[0] for reminder in reminders)
+                return DEAD
+            except NetworkError as e:
+                metrics.SEND_FAILURES.inc(type(e).__name__)
+                delay = BACKOFF_BASE * 2 ** attempt
+                logging.warning(f"Мережева помилка для ID {rem_id}, повтор через {delay} с: {e}")
+                await asyncio.sleep(delay)
+                continue
+            except Exception as e:
+                metrics.SEND_FAILURES.inc(type(e).__name__)
+                logging.error(f"Не вдалося надіслати нагадування ID {rem_id}: {e}")
+                break
+            sent_at = time.time()
+            for reminder in reminders:
+                metrics.DELIVERY_LAG.observe(sent_at - reminder[2])
+                self._sent.append((reminder[0], reminder[2], reminder[4] if len(reminder) > 4 else None))
+            self.sent_total += len(reminders)
+            if len(self._sent) >= FLUSH_SIZE:
+                await self.flush()
+            return SENT
+        self.failed_total += len(reminders)
+        return RETRY
+
+    async def flush(self):
+        if not self._sent and not self._dead:
+            return
+        sent, self._sent = self._sent, []
+        dead, self._dead = self._dead, []
+        now = int(time.time())
+        sent_ids, rescheduled = [], []
+        for rem_id, rem_time, recurrence in sent:
+            try:
+                next_time = next_occurrence(recurrence, rem_time, now) if recurrence is not None else None
+            except ValueError as e:
+                logging.error(f"Некоректне правило повторення нагадування ID {rem_id}, більше не повторюється: {e}")
+                next_time = None
+            if next_time is None:
+                sent_ids.append(rem_id)
+            else:
+                rescheduled.append((rem_id, next_time))
+        try:
+            await database.mark_sent_many(sent_ids, self.worker_id, rescheduled, dead)
+        except Exception as e:
+            logging.error(f"Не вдалося зберегти статус {len(sent) + len(dead)} нагадувань: {e}")
+            self._sent.extend(sent)
+            self._dead.extend(dead)
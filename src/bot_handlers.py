@@ -1,21 +1,57 @@
+import asyncio
 import logging
+import os
+import tempfile
+import time
 from datetime import datetime, timedelta
-import pytz
+from functools import lru_cache
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, BotCommand
+from telegram.error import TelegramError
 from telegram.ext import ContextTypes, ConversationHandler
+from telegram.helpers import escape_markdown
 
 import bot_database as database
+import bot_metrics as metrics
+import bot_recurrence as recurrence
+import bot_transfer as transfer
+from bot_delivery import DeliveryPipeline
+from bot_scheduler import ReminderScheduler
 
-from bot_config import TIMEZONE
+from bot_config import (
+    TIMEZONE, WORKER_ID, LEASE_SECONDS, SWEEP_INTERVAL_SECONDS, CATCHUP_AFTER_SECONDS, RETENTION_DAYS,
+    ARCHIVE_SENT_REMINDERS, COMPACTION_INTERVAL_SECONDS, COMPACTION_BATCH_SIZE, COMPACTION_MAX_BATCHES, VACUUM_PAGES,
+    METRICS_HOST, METRICS_PORT, ADMIN_IDS
+)
 
 (
     CHOOSE_TIME_OPTION, CHOOSE_CUSTOM_TYPE, GET_DAYS, GET_HOURS,
-    GET_MINUTES, GET_SPECIFIC_DATE, GET_TEXT, DELETE_REMINDER
-) = range(8)
+    GET_MINUTES, GET_SPECIFIC_DATE, GET_TEXT, DELETE_REMINDER,
+    GET_RECURRENCE, IMPORT_FILE
+) = range(10)
+
+SCHEDULER_KEY = "scheduler"
+METRICS_SERVER_KEY = "metrics_server"
+COMPACTION_TASK_KEY = "compaction_task"
+COMPACTION_FIRST_DELAY = 60
+MAX_MESSAGE_LENGTH = 4000
+PAGE_TEXT_LENGTH = 300
+FAILED_MARK = "⚠️ не доставлено"
+MAX_IMPORT_BYTES = 20 * 1024 * 1024
+
+RECURRENCE_HELP = (
+    "Як часто повторювати нагадування?\n\n"
+    "`30m`, `2h`, `1d` - кожні N хвилин, годин або днів\n"
+    "`weekdays 09:00` - щобудня о вказаний час\n"
+    "`0 9 * * 1,3` - cron-вираз: хвилина, година, день, місяць, день тижня"
+)
 
 def get_current_time():
     return datetime.now(TIMEZONE)
 
+@lru_cache(maxsize=8192)
+def format_local_time(timestamp: int, fmt: str) -> str:
+    return datetime.fromtimestamp(timestamp, TIMEZONE).strftime(fmt)
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user = update.effective_user
     await update.message.reply_html(
@@ -29,29 +65,98 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         "/set - створити нове нагадування.\n"
         "/list - показати активні нагадування.\n"
         "/delete - видалити нагадування.\n"
+        "/find <текст> - знайти нагадування за словами і видалити.\n"
+        "/import - імпортувати нагадування з CSV або .ics файлу.\n"
+        "/export - вивантажити нагадування у CSV.\n"
         "/cancel - скасувати поточну дію."
     )
     
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if update.effective_user is None or update.effective_user.id not in ADMIN_IDS:
+        await update.message.reply_text("Ця команда доступна лише адміністраторам.")
+        return
+    await update.message.reply_text(metrics.summary()[:MAX_MESSAGE_LENGTH])
+
 async def get_server_time(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     current_time = get_current_time()
     await update.message.reply_text(
         f"Мій поточний час: {current_time.strftime('%H:%M:%S')}"
     )
 
+def parse_page_callback(data: str) -> tuple:
+    _, direction, offset, rem_time, rem_id = data.split(":")
+    return direction == "p", int(offset), (int(rem_time), int(rem_id))
+
+async def load_page(chat_id: int, data: str = None) -> tuple:
+    if data is not None:
+        backwards, offset, cursor = parse_page_callback(data)
+        rows, has_more = await database.get_reminders_page(chat_id, cursor, backwards)
+        if rows and backwards:
+            return rows, max(offset - len(rows), 0), has_more, True
+        if rows:
+            return rows, offset, True, has_more
+    rows, has_more = await database.get_reminders_page(chat_id)
+    return rows, 0, False, has_more
+
+def page_navigation(prefix: str, rows: list, start: int, has_prev: bool, has_next: bool) -> list:
+    buttons = []
+    if has_prev:
+        buttons.append(InlineKeyboardButton("⬅️ Назад", callback_data=f"{prefix}:p:{start}:{rows[0][1]}:{rows[0][0]}"))
+    if has_next:
+        buttons.append(InlineKeyboardButton("Далі ➡️", callback_data=f"{prefix}:n:{start + len(rows)}:{rows[-1][1]}:{rows[-1][0]}"))
+    return buttons
+
+def shorten(text: str, limit: int = PAGE_TEXT_LENGTH) -> str:
+    # Обрізаний текст не закінчується `\`, щоб не розірвати екранування з `markdown_text`.
+    return text if len(text) <= limit else text[:limit - 1].rstrip("\\") + "…"
+
+def markdown_text(text: str, limit: int = PAGE_TEXT_LENGTH) -> str:
+    """Текст користувача для повідомлення з parse_mode='Markdown': розмітку екрановано, довжину обмежено."""
+    return shorten(escape_markdown(text, version=1), limit)
+
+def fit_page(header: str, entries: list) -> tuple:
+    """Додає записи сторінки, поки повідомлення не перевищує MAX_MESSAGE_LENGTH. Повертає текст і кількість записів."""
+    text = header
+    for count, entry in enumerate(entries):
+        if count and len(text) + len(entry) > MAX_MESSAGE_LENGTH:
+            return text, count
+        text += entry
+    return text, len(entries)
+
+async def render_list_page(chat_id: int, data: str = None):
+    rows, start, has_prev, has_next = await load_page(chat_id, data)
+    if not rows:
+        return None, None
+    entries = []
+    for idx, (rem_id, rem_time, rem_text, rule, status) in enumerate(rows, start + 1):
+        entry = f"*{idx}.* {markdown_text(rem_text)}\n   `{format_local_time(rem_time, '%d.%m.%Y о %H:%M')}`"
+        if rule:
+            entry += f" 🔁 {recurrence.describe_rule(rule)}"
+        if status == 'failed':
+            entry += f" {FAILED_MARK}"
+        entries.append(entry + "\n\n")
+    message_text, shown = fit_page("Ваші активні нагадування:\n\n", entries)
+    if shown < len(rows):
+        rows, has_next = rows[:shown], True
+    navigation = page_navigation("list", rows, start, has_prev, has_next)
+    reply_markup = InlineKeyboardMarkup([navigation]) if navigation else None
+    return message_text, reply_markup
+
 async def list_reminders(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    chat_id = update.effective_chat.id
-    reminders = database.get_pending_reminders(chat_id)
-    if not reminders:
+    message_text, reply_markup = await render_list_page(update.effective_chat.id)
+    if message_text is None:
         await update.message.reply_text("У вас немає активних нагадувань.")
         return
+    await update.message.reply_text(message_text, parse_mode='Markdown', reply_markup=reply_markup)
 
-    message_text = "Ваші активні нагадування:\n\n"
-    for idx, (rem_id, rem_time_utc_str, rem_text) in enumerate(reminders, 1):
-        rem_time_utc = pytz.utc.localize(datetime.strptime(rem_time_utc_str, "%Y-%m-%d %H:%M:%S"))
-        rem_time_local = rem_time_utc.astimezone(TIMEZONE)
-        message_text += f"*{idx}.* {rem_text}\n"
-        message_text += f"   `{rem_time_local.strftime('%d.%m.%Y о %H:%M')}`\n\n"
-    await update.message.reply_text(message_text, parse_mode='Markdown')
+async def list_page(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    query = update.callback_query
+    await query.answer()
+    message_text, reply_markup = await render_list_page(update.effective_chat.id, query.data)
+    if message_text is None:
+        await query.edit_message_text("У вас немає активних нагадувань.")
+        return
+    await query.edit_message_text(message_text, parse_mode='Markdown', reply_markup=reply_markup)
 
 async def set_reminder_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     keyboard = [
@@ -81,6 +186,7 @@ async def handle_level1_button(update: Update, context: ContextTypes.DEFAULT_TYP
             [InlineKeyboardButton("Через ... годин", callback_data="in_hours")],
             [InlineKeyboardButton("Через ... днів", callback_data="in_days")],
             [InlineKeyboardButton("Ввести точну дату", callback_data="specific_date")],
+            [InlineKeyboardButton("🔁 Повторювати регулярно", callback_data="recurring")],
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         await query.edit_message_text(text="Як саме ви хочете вказати час?", reply_markup=reply_markup)
@@ -103,6 +209,9 @@ async def handle_level2_button(update: Update, context: ContextTypes.DEFAULT_TYP
     elif choice == "specific_date":
         await query.edit_message_text(text="Введіть дату та час у форматі `ДД.ММ.РРРР ГГ:ХХ`")
         return GET_SPECIFIC_DATE
+    elif choice == "recurring":
+        await query.edit_message_text(text=RECURRENCE_HELP, parse_mode='Markdown')
+        return GET_RECURRENCE
     return ConversationHandler.END
 
 async def get_relative_time(update: Update, context: ContextTypes.DEFAULT_TYPE, unit: str) -> int:
@@ -140,52 +249,218 @@ async def get_specific_date(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text("Неправильний формат або час вже минув.")
         return GET_SPECIFIC_DATE
 
+async def get_recurrence(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    try:
+        rule = recurrence.parse_rule(update.message.text)
+        now = int(get_current_time().timestamp())
+        first_time = recurrence.next_occurrence(rule, now, now)
+    except ValueError:
+        await update.message.reply_text("Не вдалося розібрати правило.\n\n" + RECURRENCE_HELP, parse_mode='Markdown')
+        return GET_RECURRENCE
+    context.user_data['recurrence'] = rule
+    context.user_data['reminder_time'] = datetime.fromtimestamp(first_time, TIMEZONE)
+    await update.message.reply_text("Чудово! Тепер введіть текст нагадування.")
+    return GET_TEXT
+
 async def get_reminder_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     reminder_text = update.message.text
     reminder_time = context.user_data['reminder_time']
+    rule = context.user_data.get('recurrence')
     chat_id = update.effective_chat.id
-    database.add_reminder_to_db(chat_id, reminder_time, reminder_text)
+    reminder_id = await database.add_reminder(chat_id, reminder_time, reminder_text, rule)
+    scheduler = context.bot_data.get(SCHEDULER_KEY)
+    if scheduler is not None:
+        scheduler.add(reminder_id, reminder_time)
+    repeat_note = f"\n🔁 {recurrence.describe_rule(rule)}" if rule else ""
     await update.message.reply_text(
-        f"Гаразд! Я нагадаю тобі:\n*{reminder_text}*\n_{reminder_time.strftime('%d %B %Y року о %H:%M')}_",
+        f"Гаразд! Я нагадаю тобі:\n{escape_markdown(reminder_text, version=1)}\n_{reminder_time.strftime('%d %B %Y року о %H:%M')}_{repeat_note}",
         parse_mode='Markdown'
     )
     context.user_data.clear()
     return ConversationHandler.END
 
-async def delete_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    chat_id = update.effective_chat.id
-    reminders = database.get_pending_reminders(chat_id)
-    if not reminders:
-        await update.message.reply_text("У вас немає активних нагадувань для видалення.")
-        return ConversationHandler.END
-    
+async def render_delete_page(chat_id: int, data: str = None):
+    rows, start, has_prev, has_next = await load_page(chat_id, data)
+    if not rows:
+        return None
     keyboard = []
-    for rem_id, rem_time_utc_str, rem_text in reminders:
-        rem_time_utc = pytz.utc.localize(datetime.strptime(rem_time_utc_str, "%Y-%m-%d %H:%M:%S"))
-        rem_time_local = rem_time_utc.astimezone(TIMEZONE)
-        button_text = f"❌ {rem_text[:20]}... ({rem_time_local.strftime('%d.%m')})"
+    for rem_id, rem_time, rem_text, rule, status in rows:
+        repeat_mark = "🔁 " if rule else ""
+        if status == 'failed':
+            repeat_mark = "⚠️ " + repeat_mark
+        button_text = f"❌ {repeat_mark}{rem_text[:20]}... ({format_local_time(rem_time, '%d.%m')})"
         keyboard.append([InlineKeyboardButton(button_text, callback_data=f"del_{rem_id}")])
+    navigation = page_navigation("delpage", rows, start, has_prev, has_next)
+    if navigation:
+        keyboard.append(navigation)
     keyboard.append([InlineKeyboardButton("Скасувати", callback_data="cancel_delete")])
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    return InlineKeyboardMarkup(keyboard)
+
+async def delete_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    reply_markup = await render_delete_page(update.effective_chat.id)
+    if reply_markup is None:
+        await update.message.reply_text("У вас немає активних нагадувань для видалення.")
+        return ConversationHandler.END
     await update.message.reply_text("Яке нагадування ви хочете видалити?", reply_markup=reply_markup)
     return DELETE_REMINDER
 
+async def delete_page(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    query = update.callback_query
+    await query.answer()
+    reply_markup = await render_delete_page(update.effective_chat.id, query.data)
+    if reply_markup is None:
+        await query.edit_message_text("У вас немає активних нагадувань для видалення.")
+        return ConversationHandler.END
+    await query.edit_message_text("Яке нагадування ви хочете видалити?", reply_markup=reply_markup)
+    return DELETE_REMINDER
+
+async def render_find_page(chat_id: int, query_text: str, offset: int = 0, backwards: bool = False):
+    """Сторінка результатів пошуку, що починається з `offset`, або (`backwards`) закінчується перед ним.
+
+    Сторінки обрізаються `fit_page`, тож назад гортаємо від поточного зсуву, а не на PAGE_SIZE.
+    """
+    start = max(offset - database.PAGE_SIZE, 0) if backwards else offset
+    rows, has_more = await database.search(chat_id, query_text, start)
+    if backwards:
+        rows, has_more = rows[:offset - start], True
+    if not rows:
+        return None, None
+    header = f"Знайдено за запитом «{markdown_text(query_text)}». Оберіть нагадування, щоб видалити:\n\n"
+    entries = []
+    for idx, (rem_id, rem_time, rem_text, rule, status) in enumerate(rows, start + 1):
+        repeat_mark = "🔁 " if rule else ""
+        failed_mark = f" {FAILED_MARK}" if status == 'failed' else ""
+        entries.append(f"{idx}. {repeat_mark}{markdown_text(rem_text)} ({format_local_time(rem_time, '%d.%m.%Y о %H:%M')}){failed_mark}\n")
+    if backwards:
+        _, shown = fit_page(header, entries[::-1])
+        rows, entries, offset = rows[len(rows) - shown:], entries[len(entries) - shown:], offset - shown
+    message_text, shown = fit_page(header, entries)
+    if shown < len(rows):
+        rows, has_more = rows[:shown], True
+    keyboard = [
+        [InlineKeyboardButton(f"❌ {idx}. {rem_text[:20]}...", callback_data=f"del_{rem_id}")]
+        for idx, (rem_id, _, rem_text, _, _) in enumerate(rows, offset + 1)
+    ]
+    navigation = []
+    if offset > 0:
+        navigation.append(InlineKeyboardButton("⬅️ Назад", callback_data=f"findpage:p:{offset}"))
+    if has_more:
+        navigation.append(InlineKeyboardButton("Далі ➡️", callback_data=f"findpage:n:{offset + len(rows)}"))
+    if navigation:
+        keyboard.append(navigation)
+    keyboard.append([InlineKeyboardButton("Скасувати", callback_data="cancel_delete")])
+    return message_text, InlineKeyboardMarkup(keyboard)
+
+async def find_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    query_text = " ".join(context.args or [])
+    if not query_text.strip():
+        await update.message.reply_text("Вкажіть, що шукати: /find <текст>")
+        return ConversationHandler.END
+    message_text, reply_markup = await render_find_page(update.effective_chat.id, query_text)
+    if message_text is None:
+        await update.message.reply_text(f"За запитом «{query_text}» нічого не знайдено.")
+        return ConversationHandler.END
+    context.user_data['find_query'] = query_text
+    await update.message.reply_text(message_text, parse_mode='Markdown', reply_markup=reply_markup)
+    return DELETE_REMINDER
+
+async def find_page(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    query = update.callback_query
+    await query.answer()
+    query_text = context.user_data.get('find_query', "")
+    *direction, offset = query.data.split(":")[1:]
+    message_text, reply_markup = await render_find_page(update.effective_chat.id, query_text, int(offset), direction == ["p"])
+    if message_text is None:
+        await query.edit_message_text("Більше нічого не знайдено.")
+        return ConversationHandler.END
+    await query.edit_message_text(message_text, parse_mode='Markdown', reply_markup=reply_markup)
+    return DELETE_REMINDER
+
 async def delete_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
     data = query.data
+    context.user_data.pop('find_query', None)
     if data == "cancel_delete":
         await query.edit_message_text("Видалення скасовано.")
         return ConversationHandler.END
     try:
         reminder_id_to_delete = int(data.split("_")[1])
-        database.delete_reminder_from_db(reminder_id_to_delete)
+        await database.delete_reminder(reminder_id_to_delete)
+        scheduler = context.bot_data.get(SCHEDULER_KEY)
+        if scheduler is not None:
+            scheduler.remove(reminder_id_to_delete)
         await query.edit_message_text("Нагадування успішно видалено!")
     except (IndexError, ValueError) as e:
         logging.error(f"Помилка при видаленні нагадування: {e}")
         await query.edit_message_text("Сталася помилка. Спробуйте ще раз.")
     return ConversationHandler.END
 
+async def import_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    await update.message.reply_text(
+        "Надішліть файл .csv або .ics.\n\n"
+        "CSV: `час,текст[,повторення]`, час у форматі `ДД.ММ.РРРР ГГ:ХХ`.\n"
+        "iCalendar: події VEVENT з DTSTART і SUMMARY.",
+        parse_mode='Markdown'
+    )
+    return IMPORT_FILE
+
+async def import_file(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    document = update.message.document
+    file_name = (document.file_name or "").lower()
+    kind = "ics" if file_name.endswith(".ics") else "csv" if file_name.endswith(".csv") else None
+    if kind is None:
+        await update.message.reply_text("Підтримуються лише файли .csv та .ics.")
+        return IMPORT_FILE
+    if document.file_size and document.file_size > MAX_IMPORT_BYTES:
+        await update.message.reply_text("Файл завеликий (максимум 20 МБ).")
+        return ConversationHandler.END
+
+    chat_id = update.effective_chat.id
+    fd, path = tempfile.mkstemp(suffix=f".{kind}")
+    os.close(fd)
+    try:
+        telegram_file = await document.get_file()
+        await telegram_file.download_to_drive(path)
+        started = time.monotonic()
+        stats = await transfer.import_reminders(chat_id, path, kind)
+    except ValueError as e:
+        logging.warning(f"Імпорт для чату {chat_id} не вдався: {e}")
+        await update.message.reply_text(f"Не вдалося імпортувати файл: {e}.")
+        return ConversationHandler.END
+    except TelegramError as e:
+        logging.error(f"Не вдалося завантажити файл імпорту для чату {chat_id}: {e}")
+        await update.message.reply_text("Не вдалося завантажити файл з Telegram, спробуйте ще раз: /import")
+        return ConversationHandler.END
+    finally:
+        os.remove(path)
+    logging.info(
+        f"Імпорт для чату {chat_id}: прийнято {stats.accepted}, відхилено {stats.rejected} "
+        f"за {time.monotonic() - started:.2f} с"
+    )
+    scheduler = context.bot_data.get(SCHEDULER_KEY)
+    if scheduler is not None and stats.accepted:
+        scheduler.refresh()
+    summary = f"Імпорт завершено.\nПрийнято: {stats.accepted}\nВідхилено: {stats.rejected}"
+    if stats.errors:
+        summary += "\n\n" + "\n".join(stats.errors)
+    await update.message.reply_text(summary)
+    return ConversationHandler.END
+
+async def export_reminders(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    chat_id = update.effective_chat.id
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        exported = await transfer.export_reminders(chat_id, path)
+        if not exported:
+            await update.message.reply_text("У вас немає активних нагадувань.")
+            return
+        with open(path, "rb") as document:
+            await update.message.reply_document(document=document, filename="reminders.csv")
+    finally:
+        os.remove(path)
+
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     if update.callback_query:
         await update.callback_query.edit_message_text(text="Дію скасовано.")
@@ -194,15 +469,44 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     context.user_data.clear()
     return ConversationHandler.END
 
-async def check_reminders(context: ContextTypes.DEFAULT_TYPE):
-    reminders_to_send = database.get_all_pending_reminders_for_check()
-    for rem_id, chat_id, rem_text in reminders_to_send:
+async def compact_reminders(context: ContextTypes.DEFAULT_TYPE):
+    started = time.monotonic()
+    older_than = int(time.time()) - RETENTION_DAYS * 24 * 3600
+    moved = 0
+    for _ in range(COMPACTION_MAX_BATCHES):
+        batch = await database.compact_sent(older_than, COMPACTION_BATCH_SIZE, ARCHIVE_SENT_REMINDERS)
+        moved += batch
+        if batch < COMPACTION_BATCH_SIZE:
+            break
+        await asyncio.sleep(0)
+    freed_pages = await database.vacuum(VACUUM_PAGES)
+    action = "архівовано" if ARCHIVE_SENT_REMINDERS else "видалено"
+    logging.info(
+        f"Компакція: {action} {moved} надісланих нагадувань, звільнено {freed_pages} сторінок "
+        f"за {time.monotonic() - started:.2f} с"
+    )
+
+async def run_compaction(interval: float, first: float = COMPACTION_FIRST_DELAY):
+    """Та сама періодична компакція у власній asyncio-задачі - для запуску без JobQueue."""
+    await asyncio.sleep(first)
+    while True:
         try:
-            await context.bot.send_message(chat_id=chat_id, text=f"🔔 *НАГАДУВАННЯ* 🔔\n\n{rem_text}", parse_mode='Markdown')
-            database.mark_reminder_sent(rem_id)
-            logging.info(f"Надіслано нагадування ID {rem_id} для чату {chat_id}")
+            await compact_reminders(None)
         except Exception as e:
-            logging.error(f"Не вдалося надіслати нагадування ID {rem_id}: {e}")
+            logging.error(f"Помилка компакції бази: {e}")
+        await asyncio.sleep(interval)
+
+def schedule_compaction(application):
+    if application.job_queue is not None:
+        application.job_queue.run_repeating(
+            compact_reminders, interval=COMPACTION_INTERVAL_SECONDS, first=COMPACTION_FIRST_DELAY
+        )
+        return
+    logging.warning(
+        "JobQueue недоступна (встановіть python-telegram-bot[job-queue]), "
+        "компакція бази працює в окремій asyncio-задачі."
+    )
+    application.bot_data[COMPACTION_TASK_KEY] = asyncio.create_task(run_compaction(COMPACTION_INTERVAL_SECONDS))
 
 async def post_init(application):
     commands = [
@@ -210,9 +514,38 @@ async def post_init(application):
         BotCommand("set", "Створити нове нагадування"),
         BotCommand("list", "Показати мої нагадування"),
         BotCommand("delete", "Видалити нагадування"),
+        BotCommand("find", "Знайти нагадування"),
         BotCommand("time", "Показати поточний час бота"),
         BotCommand("help", "Отримати допомогу"),
+        BotCommand("import", "Імпортувати нагадування з файлу"),
+        BotCommand("export", "Вивантажити нагадування у CSV"),
         BotCommand("cancel", "Скасувати поточну дію"),
     ]
     await application.bot.set_my_commands(commands)
-    logging.info("Меню команд налаштовано.")
\ No newline at end of file
+    logging.info("Меню команд налаштовано.")
+    pipeline = DeliveryPipeline(application.bot, worker_id=WORKER_ID, catchup_after=CATCHUP_AFTER_SECONDS)
+    scheduler = ReminderScheduler(
+        pipeline.deliver, WORKER_ID, lease_seconds=LEASE_SECONDS, sweep_interval=SWEEP_INTERVAL_SECONDS
+    )
+    await scheduler.start()
+    application.bot_data[SCHEDULER_KEY] = scheduler
+    schedule_compaction(application)
+    if METRICS_PORT:
+        try:
+            application.bot_data[METRICS_SERVER_KEY] = await metrics.start_server(METRICS_HOST, METRICS_PORT)
+        except OSError as e:
+            logging.error(f"Не вдалося запустити сервер метрик на порту {METRICS_PORT}: {e}")
+
+async def post_shutdown(application):
+    compaction = application.bot_data.pop(COMPACTION_TASK_KEY, None)
+    if compaction is not None:
+        compaction.cancel()
+    scheduler = application.bot_data.pop(SCHEDULER_KEY, None)
+    if scheduler is not None:
+        await scheduler.stop()
+        logging.info("Планувальник зупинено.")
+    server = application.bot_data.pop(METRICS_SERVER_KEY, None)
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+    logging.info(f"Статистика кешу нагадувань: {database.cache.stats()}")
@@ -4,52 +4,112 @@ from telegram.ext import (
     MessageHandler, CallbackQueryHandler, filters
 )
 
-from bot_config import TOKEN
+from bot_config import (
+    TOKEN, CACHE_MAX_CHATS, CACHE_MAX_ROWS, CACHE_TTL_SECONDS,
+    UPDATE_MODE, CONCURRENT_UPDATES, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH,
+    WEBHOOK_SECRET_TOKEN, WEBHOOK_URL, CONVERT_AUTO_VACUUM
+)
 import bot_handlers as handlers
 import bot_database as database
+import bot_metrics as metrics
+from bot_persistence import SQLitePersistence
+from bot_updates import ChatOrderedUpdateProcessor
 
-def main() -> None:
-    print("--- [main.py] Функція main() почала роботу ---")
-    logging.basicConfig(
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
+def build_application(token: str = TOKEN, request=None, concurrent_updates: int = CONCURRENT_UPDATES) -> Application:
+    builder = (
+        Application.builder().token(token)
+        .concurrent_updates(ChatOrderedUpdateProcessor(concurrent_updates))
+        .persistence(SQLitePersistence())
+        .post_init(handlers.post_init).post_shutdown(handlers.post_shutdown)
     )
-    database.init_db()
-    application = Application.builder().token(TOKEN).post_init(handlers.post_init).build()
+    if request is not None:
+        builder = builder.request(request).get_updates_request(request)
+    application = builder.build()
 
     set_conv = ConversationHandler(
         entry_points=[CommandHandler("set", handlers.set_reminder_start)],
         states={
-            handlers.CHOOSE_TIME_OPTION: [CallbackQueryHandler(handlers.handle_level1_button)],
-            handlers.CHOOSE_CUSTOM_TYPE: [CallbackQueryHandler(handlers.handle_level2_button)],
+            handlers.CHOOSE_TIME_OPTION: [
+                CallbackQueryHandler(handlers.handle_level1_button, pattern="^(1_min|1_hour|custom_time)$")
+            ],
+            handlers.CHOOSE_CUSTOM_TYPE: [
+                CallbackQueryHandler(
+                    handlers.handle_level2_button, pattern="^(in_minutes|in_hours|in_days|specific_date|recurring)$"
+                )
+            ],
             handlers.GET_MINUTES: [MessageHandler(filters.TEXT & ~filters.COMMAND, handlers.get_minutes)],
             handlers.GET_HOURS: [MessageHandler(filters.TEXT & ~filters.COMMAND, handlers.get_hours)],
             handlers.GET_DAYS: [MessageHandler(filters.TEXT & ~filters.COMMAND, handlers.get_days)],
             handlers.GET_SPECIFIC_DATE: [MessageHandler(filters.TEXT & ~filters.COMMAND, handlers.get_specific_date)],
+            handlers.GET_RECURRENCE: [MessageHandler(filters.TEXT & ~filters.COMMAND, handlers.get_recurrence)],
             handlers.GET_TEXT: [MessageHandler(filters.TEXT & ~filters.COMMAND, handlers.get_reminder_text)],
         },
         fallbacks=[CommandHandler("cancel", handlers.cancel)],
-        per_message=False
+        per_message=False,
+        name="set_conv",
+        persistent=True
     )
     delete_conv = ConversationHandler(
-        entry_points=[CommandHandler("delete", handlers.delete_start)],
-        states={handlers.DELETE_REMINDER: [CallbackQueryHandler(handlers.delete_confirm)]},
+        entry_points=[
+            CommandHandler("delete", handlers.delete_start),
+            CommandHandler("find", handlers.find_start),
+        ],
+        states={
+            handlers.DELETE_REMINDER: [
+                CallbackQueryHandler(handlers.delete_page, pattern="^delpage:"),
+                CallbackQueryHandler(handlers.find_page, pattern="^findpage:"),
+                CallbackQueryHandler(handlers.delete_confirm, pattern=r"^(del_\d+|cancel_delete)$"),
+            ],
+        },
+        fallbacks=[CommandHandler("cancel", handlers.cancel)],
+        per_message=False,
+        name="delete_conv",
+        persistent=True
+    )
+
+    import_conv = ConversationHandler(
+        entry_points=[CommandHandler("import", handlers.import_start)],
+        states={handlers.IMPORT_FILE: [MessageHandler(filters.Document.ALL, handlers.import_file)]},
         fallbacks=[CommandHandler("cancel", handlers.cancel)],
-        per_message=False
+        per_message=False,
+        name="import_conv",
+        persistent=True
     )
 
     application.add_handler(set_conv)
     application.add_handler(delete_conv)
+    application.add_handler(import_conv)
     application.add_handler(CommandHandler("start", handlers.start))
     application.add_handler(CommandHandler("help", handlers.help_command))
     application.add_handler(CommandHandler("list", handlers.list_reminders))
+    application.add_handler(CallbackQueryHandler(handlers.list_page, pattern="^list:"))
     application.add_handler(CommandHandler("time", handlers.get_server_time))
+    application.add_handler(CommandHandler("export", handlers.export_reminders))
+    application.add_handler(CommandHandler("stats", handlers.stats_command))
+    metrics.instrument_handlers(application)
+    return application
+
+def main() -> None:
+    print("--- [main.py] Функція main() почала роботу ---")
+    logging.basicConfig(
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
+    )
+    database.cache.configure(max_chats=CACHE_MAX_CHATS, max_rows=CACHE_MAX_ROWS, ttl=CACHE_TTL_SECONDS)
+    database.init_db(CONVERT_AUTO_VACUUM)
+    application = build_application()
 
-    job_queue = application.job_queue
-    job_queue.run_repeating(handlers.check_reminders, interval=30, first=10)
-    
-    print("--- [main.py] Все налаштовано, зараз буде запущено run_polling() ---")
+    print(f"--- [main.py] Все налаштовано, зараз буде запущено режим {UPDATE_MODE} ---")
     logging.info("Запускаємо бота...")
-    application.run_polling()
+    try:
+        if UPDATE_MODE == "webhook":
+            application.run_webhook(
+                listen=WEBHOOK_LISTEN, port=WEBHOOK_PORT, url_path=WEBHOOK_PATH,
+                secret_token=WEBHOOK_SECRET_TOKEN, webhook_url=WEBHOOK_URL
+            )
+        else:
+            application.run_polling()
+    finally:
+        database.close_db()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,224 @@
+import asyncio
+import bisect
+import functools
+import logging
+import threading
+import time
+
+from telegram.ext import ConversationHandler
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+READ_TIMEOUT = 5
+
+def _labels(label_name: str, label, extra: str = "") -> str:
+    parts = [f'{label_name}="{label}"'] if label_name and label is not None else []
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Histogram:
+    """Гістограма з фіксованими кошиками; запис - бінарний пошук і два інкременти під замком."""
+
+    def __init__(self, name: str, help_text: str, label_name: str = None, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_name = label_name
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label=None):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {label: (list(counts), total) for label, (counts, total) in self._series.items()}
+
+    def quantile(self, counts: list, q: float) -> float:
+        """Верхня межа кошика, у який потрапляє квантиль `q` (оцінка зверху)."""
+        target = q * sum(counts)
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label, (counts, total) in sorted(self.snapshot().items(), key=lambda item: str(item[0])):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                bucket_labels = _labels(self.label_name, label, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_name, label)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_name, label)} {cumulative}")
+        return lines
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_name: str = None):
+        self.name = name
+        self.help_text = help_text
+        self.label_name = label_name
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label=None, amount: float = 1):
+        with self._lock:
+            self._values[label] = self._values.get(label, 0) + amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label, value in sorted(self.snapshot().items(), key=lambda item: str(item[0])):
+            lines.append(f"{self.name}{_labels(self.label_name, label)} {value}")
+        return lines
+
+class Gauge:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def render(self) -> list:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {self.value}"]
+
+class Sampled:
+    """Значення, яке читається функцією `sample` лише під час запиту /metrics (напр. лічильники кешу)."""
+
+    def __init__(self, name: str, help_text: str, sample, kind: str = "gauge"):
+        self.name = name
+        self.help_text = help_text
+        self.sample = sample
+        self.kind = kind
+
+    def render(self) -> list:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}", f"{self.name} {self.sample()}"]
+
+DB_LATENCY = Histogram("reminder_db_call_seconds", "Тривалість викликів bot_database.", "function")
+HANDLER_LATENCY = Histogram("reminder_handler_seconds", "Тривалість обробників оновлень.", "handler")
+DELIVERY_LAG = Histogram("reminder_delivery_lag_seconds", "Час надсилання мінус reminder_time.", buckets=LAG_BUCKETS)
+SEND_FAILURES = Counter("reminder_send_failures_total", "Помилки надсилання за типом винятку.", "exception")
+DISPATCH_QUEUE = Gauge("reminder_dispatch_queue_depth", "Захоплені нагадування, що ще очікують надсилання.")
+SCHEDULER_WINDOW = Gauge("reminder_scheduler_window", "Нагадування у вікні планувальника.")
+DELIVERY_OUTCOMES = Counter("reminder_deliveries_total", "Нагадування за результатом доставки (sent, retry, dead).", "outcome")
+DELIVERY_THROUGHPUT = Gauge("reminder_delivery_throughput", "Нагадувань за секунду в останній доставленій пачці.")
+
+REGISTRY = [
+    DB_LATENCY, HANDLER_LATENCY, DELIVERY_LAG, SEND_FAILURES, DISPATCH_QUEUE, SCHEDULER_WINDOW,
+    DELIVERY_OUTCOMES, DELIVERY_THROUGHPUT,
+]
+
+def register(metric):
+    REGISTRY.append(metric)
+
+CACHE_STATS = (
+    ("hits", "counter", "Читання, віддані з кешу."),
+    ("misses", "counter", "Читання, що пішли в базу."),
+    ("evictions", "counter", "Чати, витіснені з кешу за лімітами."),
+    ("invalidations", "counter", "Інвалідації кешу після записів."),
+    ("chats", "gauge", "Чати в кеші."),
+    ("rows", "gauge", "Рядки в кеші."),
+)
+
+def _cache_stat(cache, key: str):
+    return cache.stats()[key]
+
+def register_cache(cache):
+    """Експортує лічильники ChatCache; значення читаються з `cache.stats()` під час запиту."""
+    for key, kind, help_text in CACHE_STATS:
+        name = f"reminder_cache_{key}_total" if kind == "counter" else f"reminder_cache_{key}"
+        register(Sampled(name, help_text, functools.partial(_cache_stat, cache, key), kind))
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+def summary() -> str:
+    """Короткий текстовий звіт для /stats."""
+    lines = []
+    for histogram in (DB_LATENCY, HANDLER_LATENCY, DELIVERY_LAG):
+        series = histogram.snapshot()
+        if not series:
+            continue
+        lines.append(f"{histogram.name}:")
+        for label, (counts, total) in sorted(series.items(), key=lambda item: -sum(item[1][0])):
+            count = sum(counts)
+            name = label if label is not None else "усього"
+            lines.append(
+                f"  {name}: n={count}, сер. {total / count * 1000:.1f} мс, "
+                f"p95 ≤ {histogram.quantile(counts, 0.95) * 1000:g} мс"
+            )
+    failures = SEND_FAILURES.snapshot()
+    if failures:
+        lines.append("Помилки надсилання: " + ", ".join(f"{name}={value}" for name, value in sorted(failures.items())))
+    lines.append(f"Черга доставки: {DISPATCH_QUEUE.value}, вікно планувальника: {SCHEDULER_WINDOW.value}")
+    lines.append(f"Швидкість доставки: {DELIVERY_THROUGHPUT.value:.1f} нагадувань/с")
+    return "\n".join(lines)
+
+def timed_handler(callback, observe=HANDLER_LATENCY.observe):
+    name = callback.__name__
+
+    async def wrapper(update, context):
+        started = time.perf_counter()
+        try:
+            return await callback(update, context)
+        finally:
+            observe(time.perf_counter() - started, name)
+    wrapper.__name__ = name
+    return wrapper
+
+def instrument_handlers(application, observe=HANDLER_LATENCY.observe):
+    """Обгортає колбеки всіх зареєстрованих обробників, включно з вкладеними в ConversationHandler.
+
+    `observe(секунди, ім'я обробника)` отримує тривалість кожного виклику; за замовчуванням - HANDLER_LATENCY.
+    """
+    for group in application.handlers.values():
+        for handler in group:
+            nested = [handler]
+            if isinstance(handler, ConversationHandler):
+                nested = list(handler.entry_points) + list(handler.fallbacks)
+                nested += [inner for state in handler.states.values() for inner in state]
+            for inner in nested:
+                inner.callback = timed_handler(inner.callback, observe)
+
+async def _serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+        while (await asyncio.wait_for(reader.readline(), READ_TIMEOUT)) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.split()
+        if len(parts) > 1 and parts[1].split(b"?")[0] == b"/metrics":
+            status, body = "200 OK", render().encode()
+        else:
+            status, body = "404 Not Found", b"Not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+async def start_server(host: str, port: int) -> asyncio.AbstractServer:
+    server = await asyncio.start_server(_serve, host, port)
+    logging.info(f"Метрики доступні на http://{host}:{port}/metrics")
+    return server
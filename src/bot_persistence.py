@@ -0,0 +1,141 @@
+import asyncio
+import json
+import logging
+import pickle
+import time
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+import bot_database as database
+from bot_config import PERSISTENCE_INTERVAL_SECONDS, CONVERSATION_TTL_SECONDS
+
+class SQLitePersistence(BasePersistence):
+    """Зберігає user_data і стани розмов у базі бота, по рядку на ключ.
+
+    Application викликає update_* раз на `update_interval`; зміни лише
+    накопичуються в пам'яті, а після циклу записуються однією транзакцією
+    (і ще раз у `flush` під час зупинки). user_data користувача читається з
+    бази під час його першого оновлення, тож старт не залежить від кількості
+    користувачів. Стани розмов Application читає один раз при старті, але в
+    базі лежать лише незавершені розмови, не старші за `conversation_ttl`.
+    """
+
+    def __init__(self, update_interval: float = PERSISTENCE_INTERVAL_SECONDS,
+                 conversation_ttl: int = CONVERSATION_TTL_SECONDS):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval,
+        )
+        self.conversation_ttl = conversation_ttl
+        self._loaded_users = set()
+        self._persisted = {}
+        self._pending_users = {}
+        self._pending_conversations = {}
+        self._flush_task = None
+
+    async def get_user_data(self) -> dict:
+        return {}
+
+    async def get_chat_data(self) -> dict:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name: str) -> dict:
+        rows = await database.get_conversations(name, int(time.time()) - self.conversation_ttl)
+        return {tuple(json.loads(conv_key)): pickle.loads(state) for conv_key, state in rows}
+
+    async def refresh_user_data(self, user_id: int, user_data: dict):
+        if user_id in self._loaded_users:
+            return
+        rows = await database.get_user_data(user_id)
+        self._loaded_users.add(user_id)
+        if rows:
+            self._persisted[user_id] = dict(rows)
+            for key, value in rows:
+                user_data.setdefault(key, pickle.loads(value))
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict):
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict):
+        pass
+
+    async def update_user_data(self, user_id: int, data: dict):
+        self._pending_users[user_id] = data
+        self._schedule_flush()
+
+    async def drop_user_data(self, user_id: int):
+        self._pending_users[user_id] = None
+        self._schedule_flush()
+
+    async def update_conversation(self, name: str, key: tuple, new_state):
+        self._pending_conversations[(name, json.dumps(key))] = new_state
+        self._schedule_flush()
+
+    async def update_chat_data(self, chat_id: int, data: dict):
+        pass
+
+    async def drop_chat_data(self, chat_id: int):
+        pass
+
+    async def update_bot_data(self, data: dict):
+        pass
+
+    async def update_callback_data(self, data):
+        pass
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_pending())
+
+    async def _flush_pending(self):
+        # Даємо решті update_* з поточного циклу Application дописатись у буфер.
+        await asyncio.sleep(0)
+        while self._pending_users or self._pending_conversations:
+            if not await self._write():
+                return
+
+    async def _write(self) -> bool:
+        users, self._pending_users = self._pending_users, {}
+        conversations, self._pending_conversations = self._pending_conversations, {}
+        upserts, deletes, drops, snapshots = [], [], [], {}
+        for user_id, data in users.items():
+            if data is None:
+                drops.append(user_id)
+                snapshots[user_id] = {}
+                continue
+            current = {key: pickle.dumps(value) for key, value in data.items()}
+            previous = self._persisted.get(user_id, {})
+            upserts += [(user_id, key, value) for key, value in current.items() if previous.get(key) != value]
+            deletes += [(user_id, key) for key in previous if key not in current]
+            snapshots[user_id] = current
+        now = int(time.time())
+        states = [(name, key, pickle.dumps(state), now) for (name, key), state in conversations.items() if state is not None]
+        ended = [(name, key) for (name, key), state in conversations.items() if state is None]
+        try:
+            await database.save_state(upserts, deletes, drops, states, ended)
+        except Exception as e:
+            logging.error(f"Не вдалося зберегти стан розмов: {e}")
+            for user_id, data in users.items():
+                self._pending_users.setdefault(user_id, data)
+            for key, state in conversations.items():
+                self._pending_conversations.setdefault(key, state)
+            return False
+        for user_id, current in snapshots.items():
+            if current:
+                self._persisted[user_id] = current
+            else:
+                self._persisted.pop(user_id, None)
+        return True
+
+    async def flush(self):
+        if self._flush_task is not None:
+            await self._flush_task
+        while self._pending_users or self._pending_conversations:
+            if not await self._write():
+                return
@@ -0,0 +1,128 @@
+import re
+from datetime import datetime, timedelta
+
+from bot_config import TIMEZONE
+
+INTERVAL_UNITS = {"m": 60, "h": 3600, "d": 86400}
+UNIT_LABELS = {"m": "хв", "h": "год", "d": "дн"}
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+MAX_SEARCH_DAYS = 366 * 5
+
+INTERVAL_RE = re.compile(r"^(\d+)\s*([mhd])$")
+WEEKDAYS_RE = re.compile(r"^weekdays\s+(\d{1,2}):(\d{2})$")
+
+def parse_rule(text: str) -> str:
+    """Перетворює введення користувача на нормалізоване правило повторення.
+
+    Підтримується `30m`/`2h`/`1d` (інтервал), `weekdays 09:00` (щобудня) та
+    cron-вираз з п'яти полів. Результат - `every:<секунди>` або `cron:<вираз>`;
+    правило вже в такій формі (напр. з експорту) перевіряється так само.
+    """
+    text = " ".join(text.strip().lower().split())
+    if text.startswith("every:"):
+        return f"every:{_parse_interval(text[len('every:'):])}"
+    if text.startswith("cron:"):
+        text = text[len("cron:"):].strip()
+        parse_cron(text)
+        return f"cron:{text}"
+    match = INTERVAL_RE.match(text)
+    if match:
+        value = int(match.group(1))
+        if value <= 0:
+            raise ValueError("Інтервал має бути додатним")
+        return f"every:{value * INTERVAL_UNITS[match.group(2)]}"
+    match = WEEKDAYS_RE.match(text)
+    if match:
+        hour, minute = int(match.group(1)), int(match.group(2))
+        text = f"{minute} {hour} * * 1-5"
+    parse_cron(text)
+    return f"cron:{text}"
+
+def _parse_interval(value: str) -> int:
+    if not value.isdigit() or int(value) <= 0:
+        raise ValueError(f"Інтервал має бути додатним цілим числом секунд: {value}")
+    return int(value)
+
+def _parse_field(field: str, low: int, high: int) -> frozenset:
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step <= 0:
+                raise ValueError(f"Некоректний крок: {step_text}")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if high == 6 and end == 7:
+            values.add(0)
+            end = 6
+            if start == 7:
+                continue
+        if start < low or end > high or start > end:
+            raise ValueError(f"Значення поза межами: {part}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+def parse_cron(expression: str) -> tuple:
+    fields = expression.split()
+    if len(fields) != 5:
+        raise ValueError("Cron-вираз має складатися з 5 полів")
+    parsed = tuple(_parse_field(field, low, high) for field, (low, high) in zip(fields, CRON_FIELDS))
+    return parsed + (fields[2] != "*", fields[4] != "*")
+
+def _day_matches(cron: tuple, day: datetime) -> bool:
+    _, _, days, _, weekdays, dom_restricted, dow_restricted = cron
+    dom_ok = day.day in days
+    dow_ok = (day.weekday() + 1) % 7 in weekdays
+    if dom_restricted and dow_restricted:
+        return dom_ok or dow_ok
+    return dom_ok and dow_ok
+
+def next_cron_time(expression: str, after: int) -> int:
+    cron = parse_cron(expression)
+    minutes, hours, _, months, _, _, _ = cron
+    start = datetime.fromtimestamp(after, TIMEZONE).replace(tzinfo=None, second=0, microsecond=0) + timedelta(minutes=1)
+    day = start.replace(hour=0, minute=0)
+    for _ in range(MAX_SEARCH_DAYS):
+        if day.month in months and _day_matches(cron, day):
+            for hour in sorted(hours):
+                for minute in sorted(minutes):
+                    candidate = day.replace(hour=hour, minute=minute)
+                    if candidate < start:
+                        continue
+                    timestamp = int(TIMEZONE.localize(candidate).timestamp())
+                    if timestamp > after:
+                        return timestamp
+        day += timedelta(days=1)
+    raise ValueError(f"Cron-вираз {expression} не має найближчих спрацювань")
+
+def next_occurrence(rule: str, previous: int, now: int) -> int:
+    """Наступний час спрацювання, строго пізніший за `now`; пропущені під час простою повтори не накопичуються."""
+    kind, value = rule.split(":", 1)
+    if kind == "every":
+        interval = _parse_interval(value)
+        steps = max((now - previous) // interval + 1, 1)
+        return previous + steps * interval
+    if kind == "cron":
+        return next_cron_time(value, max(previous, now))
+    raise ValueError(f"Невідомий тип правила: {rule}")
+
+def describe_rule(rule: str) -> str:
+    kind, value = rule.split(":", 1)
+    if kind == "every":
+        seconds = int(value)
+        for unit in ("d", "h", "m"):
+            if seconds % INTERVAL_UNITS[unit] == 0:
+                return f"кожні {seconds // INTERVAL_UNITS[unit]} {UNIT_LABELS[unit]}"
+        return f"кожні {seconds} с"
+    minute, hour = value.split()[:2]
+    if minute.isdigit() and hour.isdigit() and value.endswith("* * 1-5"):
+        return f"щобудня о {int(hour):02d}:{int(minute):02d}"
+    return f"cron `{value}`"
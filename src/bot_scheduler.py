@@ -0,0 +1,227 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime
+
+import bot_database as database
+import bot_metrics as metrics
+from bot_recurrence import next_occurrence
+
+WINDOW_SIZE = 1000
+CLAIM_BATCH_SIZE = 500
+LEASE_SECONDS = 300
+SWEEP_INTERVAL_SECONDS = 60
+RETRY_DELAY = 60
+MAX_DELIVERY_ATTEMPTS = 5
+
+class ReminderScheduler:
+    """Мін-купа найближчих нагадувань, що спить до моменту наступного з них.
+
+    У пам'яті тримається лише вікно з WINDOW_SIZE найближчих нагадувань;
+    `_horizon` - ключ (reminder_time, id) останнього завантаженого рядка.
+    Усе, що пізніше за горизонт, довантажується з бази, коли вікно вичерпається.
+
+    Купа лише підказує, коли прокинутися: самі нагадування воркер атомарно
+    забирає з бази під оренду (`claim_due`), тому кілька процесів можуть
+    працювати з однією базою. Раз на `sweep_interval` воркер прокидається і
+    без підказок, щоб підхопити нагадування інших воркерів і прострочені оренди.
+    """
+
+    def __init__(self, deliver, worker_id: str, window_size: int = WINDOW_SIZE,
+                 lease_seconds: int = LEASE_SECONDS, sweep_interval: float = SWEEP_INTERVAL_SECONDS,
+                 batch_size: int = CLAIM_BATCH_SIZE):
+        self._deliver = deliver
+        self.worker_id = worker_id
+        self._window_size = window_size
+        self._lease_seconds = lease_seconds
+        self._sweep_interval = sweep_interval
+        self._batch_size = batch_size
+        self._heap = []
+        self._ids = set()
+        self._cancelled = set()
+        self._horizon = None
+        self._loaded = False
+        self._loading = False
+        self._added_while_loading = []
+        self._next_sweep = 0.0
+        self._catchup_started = None
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def __len__(self) -> int:
+        return len(self._ids) - len(self._cancelled)
+
+    async def start(self):
+        await self._fill_window()
+        self._task = asyncio.create_task(self._run())
+        logging.info(f"Планувальник {self.worker_id} запущено, у вікні {len(self)} нагадувань.")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def add(self, reminder_id: int, reminder_time: datetime):
+        entry = (database.to_db_time(reminder_time), reminder_id)
+        if self._loading:
+            self._added_while_loading.append(entry)
+        self._push(entry)
+
+    def refresh(self):
+        """Скидає вікно, щоб наступна ітерація перечитала його з бази (напр. після масового імпорту)."""
+        self._heap = []
+        self._ids = set()
+        self._cancelled = set()
+        self._horizon = None
+        self._loaded = False
+        self._wakeup.set()
+
+    def remove(self, reminder_id: int):
+        if reminder_id in self._ids:
+            self._cancelled.add(reminder_id)
+
+    def _push(self, entry: tuple):
+        if self._horizon is not None and entry > self._horizon:
+            return
+        if entry[1] in self._ids:
+            return
+        heapq.heappush(self._heap, entry)
+        self._ids.add(entry[1])
+        if len(self._heap) > 2 * self._window_size:
+            self._trim()
+        if self._heap[0] is entry:
+            self._wakeup.set()
+
+    def _trim(self):
+        alive = [entry for entry in self._heap if entry[1] not in self._cancelled]
+        self._cancelled.clear()
+        self._heap = heapq.nsmallest(self._window_size, alive)
+        self._ids = {entry[1] for entry in self._heap}
+        if len(alive) > self._window_size:
+            self._horizon = self._heap[-1]
+
+    def _pop(self) -> tuple:
+        entry = heapq.heappop(self._heap)
+        self._ids.discard(entry[1])
+        return entry
+
+    def _peek(self):
+        while self._heap and self._heap[0][1] in self._cancelled:
+            self._cancelled.discard(self._pop()[1])
+        return self._heap[0] if self._heap else None
+
+    async def _fill_window(self):
+        if self._loaded and self._horizon is None:
+            return
+        top = self._peek()
+        if self._loaded and top is not None and top <= self._horizon:
+            return
+        self._loading = True
+        try:
+            rows = await database.get_upcoming(self._horizon, self._window_size)
+        finally:
+            self._loading = False
+        self._loaded = True
+        self._horizon = (rows[-1][1], rows[-1][0]) if len(rows) == self._window_size else None
+        for rem_id, rem_time in rows:
+            self._push((rem_time, rem_id))
+        added, self._added_while_loading = self._added_while_loading, []
+        for entry in added:
+            self._push(entry)
+
+    def _pop_due(self, now: int) -> int:
+        due = 0
+        while True:
+            top = self._peek()
+            if top is None or top[0] > now:
+                return due
+            self._pop()
+            due += 1
+
+    def _seconds_until_next(self, now: float) -> float:
+        delay = self._next_sweep - time.monotonic()
+        top = self._peek()
+        if top is not None:
+            delay = min(delay, top[0] - now)
+        return max(delay, 0)
+
+    async def _dispatch_due(self):
+        while True:
+            claimed = await database.claim_due(self.worker_id, self._lease_seconds, self._batch_size)
+            if len(claimed) == self._batch_size and self._catchup_started is None:
+                self._catchup_started = time.monotonic()
+                logging.warning(f"Накопичено понад {self._batch_size} прострочених нагадувань, режим надолуження.")
+            if not claimed:
+                self._finish_catchup()
+                return
+            delivered = asyncio.Event()
+            keeper = asyncio.create_task(self._keep_leases([row[0] for row in claimed], delivered))
+            try:
+                failed = await self._deliver(claimed) or []
+            finally:
+                delivered.set()
+                await keeper
+            now = int(time.time())
+            if failed:
+                retries = await database.retry_later([row[0] for row in failed], self.worker_id, RETRY_DELAY, MAX_DELIVERY_ATTEMPTS)
+                for rem_id, retry_at in retries:
+                    self._push((retry_at, rem_id))
+            failed_ids = {row[0] for row in failed}
+            for rem_id, _, rem_time, _, recurrence in claimed:
+                if recurrence is None or rem_id in failed_ids:
+                    continue
+                try:
+                    self._push((next_occurrence(recurrence, rem_time, now), rem_id))
+                except ValueError:
+                    # Конвеєр уже позначив таке нагадування надісланим.
+                    continue
+            if len(claimed) < self._batch_size:
+                self._finish_catchup()
+                return
+
+    async def _keep_leases(self, reminder_ids: list, delivered: asyncio.Event):
+        # Доставка пачки в один груповий чат (20 повідомлень/хв) може тривати довше за оренду.
+        # Зупинка через подію, а не cancel: подовження, що вже виконується, має завершитися
+        # до retry_later, інакше воно перезапише час повтору.
+        while True:
+            try:
+                await asyncio.wait_for(delivered.wait(), self._lease_seconds / 3)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await database.renew_leases(reminder_ids, self.worker_id, self._lease_seconds)
+            except Exception as e:
+                logging.error(f"Не вдалося подовжити оренду {len(reminder_ids)} нагадувань: {e}")
+
+    def _finish_catchup(self):
+        if self._catchup_started is not None:
+            logging.info(f"Надолуження завершено за {time.monotonic() - self._catchup_started:.1f} с.")
+            self._catchup_started = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self._fill_window()
+                metrics.SCHEDULER_WINDOW.set(len(self))
+                now = time.time()
+                due = self._pop_due(int(now))
+                if due or time.monotonic() >= self._next_sweep:
+                    self._next_sweep = time.monotonic() + self._sweep_interval
+                    await self._dispatch_due()
+                    continue
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._seconds_until_next(now))
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Помилка планувальника нагадувань: {e}")
+                await asyncio.sleep(1)
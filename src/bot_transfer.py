@@ -0,0 +1,201 @@
+import codecs
+import csv
+import re
+import time
+from datetime import datetime
+
+import pytz
+
+import bot_database as database
+import bot_recurrence as recurrence
+from bot_config import TIMEZONE
+
+TIME_FORMATS = ("%d.%m.%Y %H:%M", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M", "%Y-%m-%d %H:%M:%S")
+CSV_HEADER = ("reminder_time", "reminder_text", "recurrence")
+MAX_TEXT_LENGTH = 4000
+MAX_REPORTED_ERRORS = 10
+ICS_FREQUENCIES = {"MINUTELY": "m", "HOURLY": "h", "DAILY": "d"}
+ENCODINGS = ("utf-8-sig", "cp1251")
+# Три кириличні літери поспіль у UTF-8; у тексті cp1251 такі пари байтів майже не трапляються.
+UTF8_CYRILLIC = re.compile(rb"(?:[\xd0\xd1][\x80-\xbf]){3}")
+
+class ImportStats:
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, line_no: int, reason: str):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"рядок {line_no}: {reason}")
+
+def parse_local_time(value: str) -> int:
+    value = value.strip()
+    for fmt in TIME_FORMATS:
+        try:
+            naive = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        return int(TIMEZONE.localize(naive).timestamp())
+    raise ValueError(f"невідомий формат часу «{value}»")
+
+def _validated(line_no: int, rem_time: int, rem_text: str, rule, now: int, stats: ImportStats):
+    rem_text = rem_text.strip()
+    if not rem_text:
+        stats.reject(line_no, "порожній текст")
+    elif len(rem_text) > MAX_TEXT_LENGTH:
+        stats.reject(line_no, "задовгий текст")
+    elif rem_time <= now and rule is None:
+        stats.reject(line_no, "час вже минув")
+    else:
+        if rule is not None and rem_time <= now:
+            rem_time = recurrence.next_occurrence(rule, rem_time, now)
+        stats.accepted += 1
+        return rem_time, rem_text, rule
+    return None
+
+def iter_csv_reminders(path: str, stats: ImportStats, encoding: str = ENCODINGS[0]):
+    """CSV: `час,текст[,правило]`, час у TIMEZONE; рядок-заголовок необов'язковий."""
+    now = int(time.time())
+    with open(path, newline="", encoding=encoding) as source:
+        for line_no, fields in enumerate(csv.reader(source), 1):
+            if not fields or not any(field.strip() for field in fields):
+                continue
+            if line_no == 1 and fields[0].strip().lower() == CSV_HEADER[0]:
+                continue
+            if len(fields) < 2:
+                stats.reject(line_no, "очікується щонайменше 2 колонки")
+                continue
+            try:
+                rem_time = parse_local_time(fields[0])
+                raw_rule = fields[2].strip() if len(fields) > 2 else ""
+                rule = recurrence.parse_rule(raw_rule) if raw_rule else None
+                if rule is not None:
+                    recurrence.next_occurrence(rule, rem_time, rem_time)
+            except ValueError as e:
+                stats.reject(line_no, str(e))
+                continue
+            row = _validated(line_no, rem_time, fields[1], rule, now, stats)
+            if row is not None:
+                yield row
+
+def _unfolded_lines(source):
+    pending = None
+    for line_no, raw in enumerate(source, 1):
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and pending is not None:
+            pending = (pending[0], pending[1] + line[1:])
+            continue
+        if pending is not None:
+            yield pending
+        pending = (line_no, line)
+    if pending is not None:
+        yield pending
+
+def _unescape_ics(value: str) -> str:
+    return (value.replace("\\n", "\n").replace("\\N", "\n")
+            .replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\"))
+
+def parse_ics_time(params: dict, value: str) -> int:
+    if value.endswith("Z"):
+        return int(pytz.utc.localize(datetime.strptime(value, "%Y%m%dT%H%M%SZ")).timestamp())
+    naive = datetime.strptime(value, "%Y%m%d") if len(value) == 8 else datetime.strptime(value, "%Y%m%dT%H%M%S")
+    zone = pytz.timezone(params["TZID"]) if "TZID" in params else TIMEZONE
+    return int(zone.localize(naive).timestamp())
+
+def parse_ics_rule(value: str) -> str:
+    parts = dict(part.split("=", 1) for part in value.split(";") if "=" in part)
+    unit = ICS_FREQUENCIES.get(parts.pop("FREQ", ""))
+    interval = parts.pop("INTERVAL", "1")
+    if unit is None or parts:
+        raise ValueError(f"непідтримуване правило повторення «{value}»")
+    return recurrence.parse_rule(f"{interval}{unit}")
+
+def iter_ics_reminders(path: str, stats: ImportStats, encoding: str = ENCODINGS[0]):
+    """iCalendar: кожна VEVENT з DTSTART і SUMMARY; RRULE - лише прості FREQ/INTERVAL."""
+    now = int(time.time())
+    with open(path, encoding=encoding) as source:
+        event = None
+        for line_no, line in _unfolded_lines(source):
+            name, _, value = line.partition(":")
+            name, *raw_params = name.split(";")
+            name = name.upper()
+            if name == "BEGIN" and value.upper() == "VEVENT":
+                event = {"line": line_no}
+            elif name == "END" and value.upper() == "VEVENT" and event is not None:
+                try:
+                    if "DTSTART" not in event:
+                        raise ValueError("немає DTSTART")
+                    rem_time = parse_ics_time(*event["DTSTART"])
+                    rule = parse_ics_rule(event["RRULE"]) if "RRULE" in event else None
+                except (ValueError, KeyError, pytz.UnknownTimeZoneError) as e:
+                    stats.reject(event["line"], str(e))
+                else:
+                    row = _validated(event["line"], rem_time, _unescape_ics(event.get("SUMMARY", "")), rule, now, stats)
+                    if row is not None:
+                        yield row
+                event = None
+            elif event is not None and name in ("DTSTART", "SUMMARY", "RRULE"):
+                params = dict(param.split("=", 1) for param in raw_params if "=" in param)
+                event[name] = (params, value) if name == "DTSTART" else value
+
+def detect_encoding(path: str) -> str:
+    """Визначає кодування до імпорту: коректний UTF-8 - UTF-8, файл без жодної кириличної
+    послідовності UTF-8 - cp1251 (типовий експорт Excel). UTF-8 з пошкодженими байтами
+    не вгадується як cp1251, а відхиляється ValueError з номером рядка."""
+    decoder = codecs.getincrementaldecoder(ENCODINGS[0])()
+    bad_line, has_utf8_cyrillic, line_no = None, False, 0
+    with open(path, "rb") as source:
+        for line_no, line in enumerate(source, 1):
+            has_utf8_cyrillic = has_utf8_cyrillic or UTF8_CYRILLIC.search(line) is not None
+            if bad_line is None:
+                try:
+                    decoder.decode(line)
+                except UnicodeDecodeError:
+                    bad_line = line_no
+            if bad_line is not None and has_utf8_cyrillic:
+                break
+    if bad_line is None:
+        try:
+            decoder.decode(b"", final=True)
+            return ENCODINGS[0]
+        except UnicodeDecodeError:
+            bad_line = line_no
+    if has_utf8_cyrillic:
+        raise ValueError(f"файл у UTF-8 містить пошкоджені байти (рядок {bad_line}), збережіть його заново в UTF-8")
+    return ENCODINGS[1]
+
+def import_file(chat_id: int, path: str, kind: str) -> ImportStats:
+    """Імпортує файл однією транзакцією в кодуванні, визначеному `detect_encoding`;
+    нечитабельний файл - ValueError з поясненням."""
+    encoding = detect_encoding(path)
+    stats = ImportStats()
+    if kind == "ics":
+        rows = iter_ics_reminders(path, stats, encoding)
+    else:
+        rows = iter_csv_reminders(path, stats, encoding)
+    try:
+        database.add_reminders_bulk(chat_id, rows)
+    except UnicodeDecodeError:
+        raise ValueError("не вдалося визначити кодування, збережіть файл у UTF-8") from None
+    except csv.Error as e:
+        raise ValueError(f"некоректний CSV: {e}") from None
+    return stats
+
+def export_file(chat_id: int, path: str) -> int:
+    exported = 0
+    with open(path, "w", newline="", encoding="utf-8") as target:
+        writer = csv.writer(target)
+        writer.writerow(CSV_HEADER)
+        for _, rem_time, rem_text, rule in database.iter_pending_reminders(chat_id):
+            local_time = datetime.fromtimestamp(rem_time, TIMEZONE).strftime(TIME_FORMATS[0])
+            writer.writerow((local_time, rem_text, rule or ""))
+            exported += 1
+    return exported
+
+async def import_reminders(chat_id: int, path: str, kind: str) -> ImportStats:
+    return await database._run(import_file, chat_id, path, kind)
+
+async def export_reminders(chat_id: int, path: str) -> int:
+    return await database._run(export_file, chat_id, path)
@@ -0,0 +1,57 @@
+import asyncio
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+MAX_PENDING_UPDATES = 4096
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Оновлення різних чатів обробляються паралельно, а одного чату - строго по черзі.
+
+    ConversationHandler зберігає стан розмови між оновленнями, тому два оновлення
+    одного чату не можна обробляти одночасно. Кожен чат має власний замок;
+    `max_concurrent_updates` обмежує лише ті оновлення, що вже виконуються, а
+    оновлення, які чекають на свій чат, не займають слотів інших чатів.
+    """
+
+    def __init__(self, max_concurrent_updates: int, max_pending_updates: int = MAX_PENDING_UPDATES):
+        super().__init__(max(max_pending_updates, max_concurrent_updates))
+        self._running = asyncio.BoundedSemaphore(max_concurrent_updates)
+        self._locks = {}
+
+    @staticmethod
+    def chat_key(update: object):
+        if not isinstance(update, Update):
+            return None
+        if update.effective_chat is not None:
+            return update.effective_chat.id
+        if update.effective_user is not None:
+            return update.effective_user.id
+        return None
+
+    async def do_process_update(self, update: object, coroutine) -> None:
+        key = self.chat_key(update)
+        if key is None:
+            async with self._running:
+                await coroutine
+            return
+        lock, waiters = self._locks.get(key, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._locks[key] = (lock, waiters + 1)
+        try:
+            async with lock:
+                async with self._running:
+                    await coroutine
+        finally:
+            lock, waiters = self._locks[key]
+            if waiters == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, waiters - 1)
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
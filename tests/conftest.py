@@ -0,0 +1,23 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import bot_database as database
+
+database.DB_NAME = "test_reminders.db"
+
+def remove_db_files():
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(database.DB_NAME + suffix):
+            os.remove(database.DB_NAME + suffix)
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown():
+    database.close_db()
+    remove_db_files()
+    database.init_db()
+    yield
+    database.close_db()
+    remove_db_files()
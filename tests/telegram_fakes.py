@@ -0,0 +1,100 @@
+import asyncio
+import json
+import time
+from telegram import Update
+from telegram.request import BaseRequest
+
+from bot_main import build_application
+
+REPLY_TIMEOUT = 5
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Bot", "username": "reminder_bot"}
+
+
+class FakeRequest(BaseRequest):
+    """Відповідає на виклики Bot API локально і запам'ятовує надіслані повідомлення."""
+
+    def __init__(self):
+        self.sent = []
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        endpoint = url.rsplit("/", 1)[-1]
+        params = request_data.parameters if request_data is not None else {}
+        if endpoint == "getMe":
+            result = BOT_USER
+        elif endpoint == "getFile":
+            return 400, json.dumps({"ok": False, "error_code": 400, "description": "Bad Request: file is too big"}).encode()
+        elif endpoint in ("sendMessage", "editMessageText"):
+            self.sent.append((int(params.get("chat_id", 0)), params.get("text")))
+            result = {
+                "message_id": len(self.sent), "date": int(time.time()), "text": params.get("text", ""),
+                "chat": {"id": int(params.get("chat_id", 0)), "type": "private"}, "from": BOT_USER,
+            }
+        else:
+            result = True
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+def message_update(update_id: int, chat_id: int, text: str) -> dict:
+    message = {
+        "message_id": update_id, "date": int(time.time()), "text": text,
+        "chat": {"id": chat_id, "type": "private"},
+        "from": {"id": chat_id, "is_bot": False, "first_name": "User"},
+    }
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"update_id": update_id, "message": message}
+
+def document_update(update_id: int, chat_id: int, file_name: str) -> dict:
+    payload = message_update(update_id, chat_id, "")
+    message = payload["message"]
+    del message["text"]
+    message["document"] = {"file_id": f"file-{update_id}", "file_unique_id": f"unique-{update_id}", "file_name": file_name}
+    return payload
+
+def callback_update(update_id: int, chat_id: int, data: str) -> dict:
+    return {"update_id": update_id, "callback_query": {
+        "id": str(update_id), "chat_instance": str(chat_id), "data": data,
+        "from": {"id": chat_id, "is_bot": False, "first_name": "User"},
+        "message": {
+            "message_id": 1, "date": int(time.time()), "text": "Коли нагадати?",
+            "chat": {"id": chat_id, "type": "private"}, "from": BOT_USER,
+        },
+    }}
+
+def run_session(payloads: list, inspect=None) -> list:
+    """Запускає окремий екземпляр Application (як після деплою), подає оновлення і зупиняє його.
+
+    Кожне оновлення має викликати рівно одне sendMessage/editMessageText; повертає тексти всіх
+    відповідей. Якщо відповіді немає за REPLY_TIMEOUT, решта оновлень не подається.
+    """
+    request = FakeRequest()
+    application = build_application("123:TEST", request=request)
+
+    async def main():
+        async with application:
+            await application.start()
+            if inspect is not None:
+                inspect(application)
+            for payload in payloads:
+                expected = len(request.sent) + 1
+                await application.update_queue.put(Update.de_json(payload, application.bot))
+                deadline = time.monotonic() + REPLY_TIMEOUT
+                while len(request.sent) < expected and time.monotonic() < deadline:
+                    await asyncio.sleep(0.01)
+                if len(request.sent) < expected:
+                    break
+            await application.stop()
+
+    asyncio.run(main())
+    return [text for _, text in request.sent]
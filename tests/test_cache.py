@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from bot_cache import ChatCache
+
+
+def test_lru_eviction_by_chats_and_rows():
+    """Перевіряємо витіснення найдавніше використаних чатів за лімітом чатів і рядків."""
+    cache = ChatCache(max_chats=2, max_rows=5)
+    cache.put(1, "all", [1, 2], 2, cache.generation())
+    cache.put(2, "all", [3], 1, cache.generation())
+    assert cache.get(1, "all") == [1, 2]
+    cache.put(3, "all", [4], 1, cache.generation())
+
+    assert cache.get(2, "all") is None
+    assert cache.get(1, "all") == [1, 2]
+
+    cache.put(3, "all", [5, 6, 7, 8], 4, cache.generation())
+    assert cache.get(1, "all") is None
+    assert cache.stats()["rows"] == 4
+    assert cache.evictions == 2
+
+def test_ttl_and_invalidation():
+    """Перевіряємо TTL, інвалідацію та відкидання значень, прочитаних до запису."""
+    cache = ChatCache(ttl=0.05)
+    generation = cache.generation()
+    cache.invalidate(7)
+    cache.put(7, "all", ["застаріле"], 1, generation)
+    assert cache.get(7, "all") is None
+
+    cache.put(7, "all", ["свіже"], 1, cache.generation())
+    assert cache.get(7, "all") == ["свіже"]
+    time.sleep(0.06)
+    assert cache.get(7, "all") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+def test_validate_clears_cache_when_data_version_changes():
+    """Зміна data_version (запис іншого процесу) очищує весь кеш і відкидає значення, прочитані до неї."""
+    cache = ChatCache()
+    cache.validate(1)
+    cache.put(7, "all", ["своє"], 1, cache.generation())
+    cache.validate(1)
+    assert cache.get(7, "all") == ["своє"]
+
+    generation = cache.generation()
+    cache.validate(2)
+    cache.put(7, "all", ["застаріле"], 1, generation)
+    assert cache.get(7, "all") is None
+    assert cache.stats()["rows"] == 0
@@ -1,6 +1,9 @@
+import asyncio
 import os
 import sys
 import sqlite3
+import threading
+import time
 from datetime import datetime, timedelta
 import pytz
 import pytest
@@ -9,17 +12,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
 
 import bot_database as database
 from bot_config import TIMEZONE
-
-database.DB_NAME = "test_reminders.db"
-
-@pytest.fixture(autouse=True)
-def setup_and_teardown():
-    if os.path.exists(database.DB_NAME):
-        os.remove(database.DB_NAME)
-    database.init_db()
-    yield
-    if os.path.exists(database.DB_NAME):
-        os.remove(database.DB_NAME)
+from tests.conftest import remove_db_files
 
 
 def test_add_and_get_reminder():
@@ -32,11 +25,12 @@ def test_add_and_get_reminder():
     reminders = database.get_pending_reminders(chat_id)
     
     assert len(reminders) == 1
-    rem_id, rem_time_str, rem_text = reminders[0]
+    rem_id, rem_time, rem_text = reminders[0]
     
     assert rem_text == reminder_text
+    assert isinstance(rem_time, int)
     
-    rem_time_from_db = pytz.utc.localize(datetime.strptime(rem_time_str, "%Y-%m-%d %H:%M:%S"))
+    rem_time_from_db = database.from_db_time(rem_time)
     
     assert rem_time_from_db.strftime("%Y-%m-%d %H:%M") == reminder_time.astimezone(pytz.utc).strftime("%Y-%m-%d %H:%M")
 
@@ -113,9 +107,267 @@ def test_time_is_stored_in_utc():
     conn = sqlite3.connect(database.DB_NAME)
     cursor = conn.cursor()
     cursor.execute("SELECT reminder_time FROM reminders WHERE chat_id = ?", (chat_id,))
-    time_str_from_db = cursor.fetchone()[0]
+    time_from_db = cursor.fetchone()[0]
     conn.close()
 
-    expected_utc_str = local_time.astimezone(pytz.utc).strftime("%Y-%m-%d %H:%M:%S")
+    expected_utc = local_time.astimezone(pytz.utc).replace(microsecond=0)
     
-    assert time_str_from_db == expected_utc_str
\ No newline at end of file
+    assert time_from_db == int(local_time.timestamp())
+    assert database.from_db_time(time_from_db) == expected_utc
+
+def test_connections_are_reused_in_wal_mode():
+    """Перевіряємо, що база працює в режимі WAL і з'єднання не відкриваються заново."""
+    manager = database._get_manager()
+    with manager.reader() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    database.add_reminder_to_db(1, datetime.now(TIMEZONE), "Перше")
+    database.get_pending_reminders(1)
+
+    assert database._get_manager() is manager
+
+
+def test_async_api_runs_off_the_event_loop():
+    """Перевіряємо асинхронний API сховища."""
+    async def scenario():
+        time_past = datetime.now(TIMEZONE) - timedelta(minutes=1)
+        reminder_id = await database.add_reminder(42, time_past, "Асинхронне")
+        assert [r[0] for r in (await database.get_reminders_page(42))[0]] == [reminder_id]
+        assert [r[0] for r in await database.claim_due("worker-1", 60, 10)] == [reminder_id]
+        await database.mark_sent_many([reminder_id], "worker-1")
+        assert await database.claim_due("worker-1", 60, 10) == []
+        await database.delete_reminder(reminder_id)
+        assert await database.get_reminders_page(42) == ([], False)
+
+    asyncio.run(scenario())
+
+def test_legacy_database_is_migrated_in_place():
+    """Перевіряємо, що стара база без версії схеми оновлюється і зберігає дані."""
+    database.close_db()
+    remove_db_files()
+    conn = sqlite3.connect(database.DB_NAME)
+    conn.execute(database.MIGRATIONS[0][0])
+    conn.execute(
+        "INSERT INTO reminders (chat_id, reminder_time, reminder_text) VALUES (?, ?, ?)",
+        (5, "2030-01-01 10:00:00", "Старе нагадування")
+    )
+    conn.commit()
+    conn.close()
+
+    database.init_db()
+
+    with database._get_manager().reader() as conn:
+        assert database.get_schema_version(conn) == len(database.MIGRATIONS)
+    rows = database.get_pending_reminders(5)
+    assert [row[2] for row in rows] == ["Старе нагадування"]
+    assert database.from_db_time(rows[0][1]) == pytz.utc.localize(datetime(2030, 1, 1, 10, 0, 0))
+
+def test_legacy_database_is_vacuumed_only_on_request(caplog):
+    """Наявна база без auto_vacuum не переписується повним VACUUM під час звичайного запуску, лише з прапорцем."""
+    database.close_db()
+    remove_db_files()
+    conn = sqlite3.connect(database.DB_NAME)
+    conn.execute(database.MIGRATIONS[0][0])
+    conn.commit()
+    conn.close()
+
+    def auto_vacuum() -> int:
+        # Відкриті з'єднання пулу пам'ятають режим на момент відкриття, тож перевіряємо новим.
+        conn = sqlite3.connect(database.DB_NAME)
+        try:
+            return conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        finally:
+            conn.close()
+
+    database.init_db()
+    assert auto_vacuum() == 0
+    assert "CONVERT_AUTO_VACUUM=1" in caplog.text
+
+    database.init_db(convert_auto_vacuum=True)
+    assert auto_vacuum() == 2
+
+def test_queries_use_partial_indexes():
+    """Перевіряємо через EXPLAIN QUERY PLAN, що запити йдуть по індексах, а не повним скануванням."""
+    with database._get_manager().reader() as conn:
+        pending_plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + database.SQL_SELECT_PENDING, (1,)))
+        due_plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + database.SQL_SELECT_DUE, (1893456000,)))
+        page_plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + database.SQL_SELECT_PAGE_AFTER, (1, 0, 0, 11)))
+
+    assert "idx_reminders_chat_pending" in pending_plan
+    assert "idx_reminders_pending_time" in due_plan
+    assert "TEMP B-TREE" not in pending_plan
+    assert "idx_reminders_chat_listed" in page_plan and "TEMP B-TREE" not in page_plan
+
+def test_keyset_pagination_walks_pages_in_both_directions():
+    """Перевіряємо keyset-пагінацію вперед і назад, включно з однаковим часом у кількох нагадувань."""
+    chat_id = 31
+    same_time = datetime.now(TIMEZONE) + timedelta(hours=1)
+    expected = [database.add_reminder_to_db(chat_id, same_time + timedelta(minutes=i // 2), f"#{i}") for i in range(7)]
+    database.add_reminder_to_db(chat_id + 1, same_time, "Чуже")
+
+    first, has_more = database.get_pending_reminders_page(chat_id, limit=3)
+    assert [row[0] for row in first] == expected[:3] and has_more
+    second, has_more = database.get_pending_reminders_page(chat_id, (first[-1][1], first[-1][0]), limit=3)
+    assert [row[0] for row in second] == expected[3:6] and has_more
+    last, has_more = database.get_pending_reminders_page(chat_id, (second[-1][1], second[-1][0]), limit=3)
+    assert [row[0] for row in last] == expected[6:] and not has_more
+
+    back, has_more = database.get_pending_reminders_page(chat_id, (last[0][1], last[0][0]), backwards=True, limit=3)
+    assert back == second and has_more
+
+def test_pending_reminders_are_cached_and_invalidated_on_write():
+    """Перевіряємо, що повторне читання йде з кешу, а запис у чат інвалідовує кеш."""
+    chat_id = 64
+    reminder_id = database.add_reminder_to_db(chat_id, datetime.now(TIMEZONE) - timedelta(minutes=1), "Перше")
+    database.get_pending_reminders(chat_id)
+    hits = database.cache.hits
+    assert len(database.get_pending_reminders(chat_id)) == 1
+    assert database.cache.hits == hits + 1
+
+    second_id = database.add_reminder_to_db(chat_id, datetime.now(TIMEZONE), "Друге")
+    assert len(database.get_pending_reminders(chat_id)) == 2
+
+    database.mark_reminders_sent([reminder_id])
+    assert [row[0] for row in database.get_pending_reminders(chat_id)] == [second_id]
+
+    database.delete_reminder_from_db(second_id)
+    assert database.get_pending_reminders(chat_id) == []
+
+def test_cache_sees_writes_from_other_processes():
+    """Запис через інше з'єднання (як з іншого воркера) скидає кеш, тож читання не повертає застарілі рядки."""
+    chat_id = 65
+    database.add_reminder_to_db(chat_id, datetime.now(TIMEZONE), "Перше")
+    assert len(database.get_pending_reminders(chat_id)) == 1
+    hits = database.cache.hits
+    assert len(database.get_pending_reminders(chat_id)) == 1
+    assert database.cache.hits == hits + 1
+
+    other = sqlite3.connect(database.DB_NAME)
+    with other:
+        other.execute(database.SQL_INSERT_REMINDER, (chat_id, database.to_db_time(datetime.now(TIMEZONE)), "Від іншого воркера", None))
+    other.close()
+
+    assert [row[2] for row in database.get_pending_reminders(chat_id)] == ["Перше", "Від іншого воркера"]
+    assert len(database.get_pending_reminders_page(chat_id)[0]) == 2
+
+def test_cached_reads_do_not_wait_for_open_write_transaction():
+    """Відкрита транзакція запису не блокує читання з кешу, а власні записи не скидають кеш інших чатів."""
+    database.add_reminder_to_db(1, datetime.now(TIMEZONE), "Кешоване")
+    assert len(database.get_pending_reminders(1)) == 1
+    writing, release = threading.Event(), threading.Event()
+
+    def long_write():
+        with database._get_manager().writer() as conn:
+            conn.execute(database.SQL_INSERT_REMINDER, (2, 0, "Довгий імпорт", None))
+            writing.set()
+            release.wait(5)
+
+    writer = threading.Thread(target=long_write)
+    writer.start()
+    writing.wait(5)
+    started = time.monotonic()
+    hits = database.cache.hits
+    assert len(database.get_pending_reminders(1)) == 1
+    elapsed = time.monotonic() - started
+    release.set()
+    writer.join()
+
+    assert elapsed < 0.5
+    assert database.cache.hits == hits + 1
+    assert len(database.get_pending_reminders(1)) == 1
+    assert database.cache.hits == hits + 2
+
+def test_compaction_archives_only_old_sent_reminders():
+    """Перевіряємо, що компакція переносить в архів лише старі надіслані нагадування."""
+    old_time = datetime.now(TIMEZONE) - timedelta(days=40)
+    old_ids = [database.add_reminder_to_db(1, old_time, f"Старе {i}") for i in range(5)]
+    database.mark_reminders_sent(old_ids)
+    recent_sent = database.add_reminder_to_db(1, datetime.now(TIMEZONE) - timedelta(days=1), "Свіже")
+    database.mark_reminder_sent(recent_sent)
+    pending_old = database.add_reminder_to_db(1, old_time, "Не надіслане")
+
+    older_than = int((datetime.now(TIMEZONE) - timedelta(days=30)).timestamp())
+    assert database.compact_sent_reminders(older_than, batch_size=3) == 3
+    assert database.compact_sent_reminders(older_than, batch_size=3) == 2
+    assert database.compact_sent_reminders(older_than, batch_size=3) == 0
+
+    with database._get_manager().reader() as conn:
+        archived = [row[0] for row in conn.execute("SELECT id FROM reminders_archive ORDER BY id")]
+        remaining = [row[0] for row in conn.execute("SELECT id FROM reminders ORDER BY id")]
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert archived == old_ids
+    assert remaining == [recent_sent, pending_old]
+
+def test_incremental_vacuum_reports_pages_actually_freed():
+    """Інкрементальний VACUUM звільняє всі запитані сторінки, а не одну, і повідомляє реальну кількість."""
+    old_time = datetime.now(TIMEZONE) - timedelta(days=40)
+    old_ids = [database.add_reminder_to_db(1, old_time, "x" * 2000) for _ in range(200)]
+    database.mark_reminders_sent(old_ids)
+    database.compact_sent_reminders(int(datetime.now(TIMEZONE).timestamp()), batch_size=500, archive=False)
+
+    def freelist() -> int:
+        with database._get_manager().reader() as conn:
+            return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    free_before = freelist()
+    assert free_before > 20
+    assert database.incremental_vacuum(20) == 20
+    assert freelist() == free_before - 20
+    assert database.incremental_vacuum(10000) == free_before - 20
+    assert freelist() == 0
+
+def test_full_text_search_is_ranked_scoped_and_synced():
+    """Пошук FTS5 шукає лише в активних нагадуваннях свого чату, ранжує збіги і стежить за змінами таблиці."""
+    later = datetime.now(TIMEZONE) + timedelta(days=1)
+    once = database.add_reminder_to_db(41, later, "Купити молоко і хліб")
+    often = database.add_reminder_to_db(41, later, "Молоко, молоко, ще раз молоко")
+    database.add_reminder_to_db(41, later, "Зателефонувати мамі")
+    database.add_reminder_to_db(-41, later, "Молоко для групи")
+
+    rows, has_more = database.search_reminders(41, "молок")
+    assert [row[0] for row in rows] == [often, once] and not has_more
+    assert [row[2] for row in database.search_reminders(-41, "МОЛОКО")[0]] == ["Молоко для групи"]
+    assert database.search_reminders(41, "молоко хліб")[0][0][0] == once
+    assert database.search_reminders(41, '"*) OR') == ([], False)
+
+    database.delete_reminder_from_db(once)
+    database.mark_reminder_sent(often)
+    assert database.search_reminders(41, "молоко") == ([], False)
+
+def test_full_text_index_is_backfilled_on_migration():
+    """Нагадування, що існували до появи FTS-індексу, знаходяться пошуком після міграції."""
+    database.close_db()
+    remove_db_files()
+    conn = sqlite3.connect(database.DB_NAME)
+    for migration in database.MIGRATIONS[:6]:
+        for statement in migration:
+            conn.execute(statement)
+    conn.execute("PRAGMA user_version = 6")
+    conn.executemany(
+        "INSERT INTO reminders (chat_id, reminder_time, reminder_text) VALUES (?, ?, ?)",
+        [(7, 1893456000 + i, f"Звіт номер {i}") for i in range(25)]
+    )
+    conn.commit()
+    conn.close()
+
+    database.init_db()
+
+    first, has_more = database.search_reminders(7, "звіт")
+    second, _ = database.search_reminders(7, "звіт", offset=len(first))
+    assert len(first) == database.PAGE_SIZE and has_more
+    assert not {row[0] for row in first} & {row[0] for row in second}
+
+def test_full_text_index_holds_only_unsent_reminders():
+    """Надіслані нагадування виходять з FTS-індексу, а повторювані під час доставки в ньому лишаються."""
+    past = datetime.now(TIMEZONE) - timedelta(minutes=1)
+    once = database.add_reminder_to_db(51, past, "Разова зустріч")
+    database.add_reminder_to_db(51, past, "Щоденна зустріч", "every:86400")
+
+    claimed = database.claim_due_reminders("worker-1", 60, 10)
+    rescheduled = [(row[0], row[2] + 86400) for row in claimed if row[4]]
+    database.mark_reminders_sent([once], "worker-1", rescheduled)
+
+    with database._get_manager().reader() as conn:
+        indexed = conn.execute("SELECT rowid FROM reminders_fts WHERE reminders_fts MATCH 'зустріч'").fetchall()
+    assert indexed == [(rescheduled[0][0],)]
+    assert [row[2] for row in database.search_reminders(51, "зустріч")[0]] == ["Щоденна зустріч"]
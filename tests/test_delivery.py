@@ -0,0 +1,150 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+import pytest
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import bot_database as database
+import bot_delivery as delivery
+from bot_config import TIMEZONE
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(delivery, "BACKOFF_BASE", 0)
+
+
+class FakeBot:
+    def __init__(self, errors=None):
+        self.sent = []
+        self.texts = []
+        self.errors = errors or {}
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await asyncio.sleep(0.01)
+        pending = self.errors.get(chat_id)
+        if pending:
+            raise pending.pop(0)
+        self.sent.append(chat_id)
+        self.texts.append(text)
+
+
+def add_due_reminders(chat_ids: list) -> list:
+    reminders = []
+    for chat_id in chat_ids:
+        rem_time = datetime.now(TIMEZONE) - timedelta(minutes=1)
+        rem_id = database.add_reminder_to_db(chat_id, rem_time, f"Для {chat_id}")
+        reminders.append((rem_id, chat_id, database.to_db_time(rem_time), f"Для {chat_id}"))
+    return reminders
+
+
+def test_pipeline_sends_concurrently_and_marks_sent_in_batch():
+    """Перевіряємо, що конвеєр надсилає паралельно і фіксує статус однією транзакцією."""
+    reminders = add_due_reminders(list(range(1, 101)))
+    bot = FakeBot()
+    pipeline = delivery.DeliveryPipeline(bot, concurrency=50, global_rate=10000)
+
+    failed = asyncio.run(pipeline.deliver(reminders))
+
+    assert failed == []
+    assert sorted(bot.sent) == list(range(1, 101))
+    assert database.get_all_pending_reminders_for_check() == []
+    assert pipeline.last_throughput > 100
+
+def test_pipeline_retries_transient_errors_and_reports_permanent_ones():
+    """Перевіряємо повтори після RetryAfter/мережевих помилок і позначку 'failed' без повторів при BadRequest."""
+    reminders = add_due_reminders([1, 2, 3])
+    bot = FakeBot({
+        1: [RetryAfter(0)],
+        2: [NetworkError("timeout"), NetworkError("timeout")],
+        3: [BadRequest("chat not found")],
+    })
+    pipeline = delivery.DeliveryPipeline(bot, global_rate=10000)
+
+    failed = asyncio.run(pipeline.deliver(reminders))
+
+    assert sorted(bot.sent) == [1, 2]
+    assert failed == []
+    assert database.get_all_pending_reminders_for_check() == []
+    assert [row[4] for row in database.get_pending_reminders_page(3)[0]] == ["failed"]
+
+def test_recurring_reminder_is_rescheduled_instead_of_marked_sent():
+    """Повторюване нагадування після надсилання переноситься на наступний час і лишається одним рядком."""
+    rem_time = datetime.now(TIMEZONE) - timedelta(minutes=1)
+    rem_id = database.add_reminder_to_db(5, rem_time, "Щогодини", "every:3600")
+    claimed = database.claim_due_reminders("worker-1", 60, 10)
+    pipeline = delivery.DeliveryPipeline(FakeBot(), global_rate=10000, worker_id="worker-1")
+
+    assert asyncio.run(pipeline.deliver(claimed)) == []
+
+    rows = database.get_pending_reminders(5)
+    assert [row[0] for row in rows] == [rem_id]
+    assert rows[0][1] == database.to_db_time(rem_time) + 3600
+
+def test_recurring_reminder_with_invalid_rule_is_sent_once():
+    """Рядок з некоректним правилом (з бази до валідації) надсилається і більше не повторюється."""
+    rem_time = datetime.now(TIMEZONE) - timedelta(minutes=1)
+    rem_id = database.add_reminder_to_db(6, rem_time, "Зламане", "every:-60")
+    claimed = database.claim_due_reminders("worker-1", 60, 10)
+    pipeline = delivery.DeliveryPipeline(FakeBot(), global_rate=10000, worker_id="worker-1")
+
+    assert asyncio.run(pipeline.deliver(claimed)) == []
+
+    assert database.get_pending_reminders(6) == []
+    with database._get_manager().reader() as conn:
+        assert conn.execute("SELECT status FROM reminders WHERE id = ?", (rem_id,)).fetchone() == ("sent",)
+
+def test_overdue_backlog_is_coalesced_per_chat_oldest_first():
+    """Після простою прострочені нагадування чату приходять одним повідомленням з початковими часами."""
+    now = datetime.now(TIMEZONE)
+    for minutes in range(40, 0, -1):
+        database.add_reminder_to_db(1, now - timedelta(hours=1, minutes=minutes), f"Пропущене {minutes}")
+    database.add_reminder_to_db(2, now - timedelta(hours=2), "Одне пропущене")
+    database.add_reminder_to_db(1, now - timedelta(seconds=5), "Щойно настало")
+    claimed = database.claim_due_reminders("worker-1", 60, 100)
+    bot = FakeBot()
+    pipeline = delivery.DeliveryPipeline(bot, global_rate=10000, worker_id="worker-1")
+
+    assert asyncio.run(pipeline.deliver(claimed)) == []
+
+    assert sorted(bot.sent) == [1, 1, 2]
+    catchup = next(text for text in bot.texts if "(40)" in text)
+    lines = [line for line in catchup.split("\n") if line.startswith("•")]
+    assert [line.rsplit(" ", 1)[1] for line in lines] == [str(minutes) for minutes in range(40, 0, -1)]
+    assert (now - timedelta(hours=1, minutes=40)).strftime("%d.%m.%Y %H:%M") in lines[0]
+    assert delivery.format_reminder("Щойно настало") in bot.texts
+    assert database.get_all_pending_reminders_for_check() == []
+    assert pipeline.sent_total == 42
+
+def test_coalesced_messages_respect_length_limit(monkeypatch):
+    """Дуже довгий список пропущених нагадувань ділиться на кілька повідомлень."""
+    monkeypatch.setattr(delivery, "MAX_MESSAGE_LENGTH", 200)
+    now = int(datetime.now(TIMEZONE).timestamp())
+    reminders = [(i, 7, now - 3600 + i, "x" * 30) for i in range(20)]
+
+    messages = delivery.coalesce(reminders, now)
+
+    assert len(messages) > 1
+    assert [row[0] for message in messages for row in message] == list(range(20))
+    assert all(len(delivery.format_catchup(message)) < 300 for message in messages)
+
+def test_markdown_in_reminder_text_does_not_break_delivery():
+    """Розмітка з тексту не з'єднується між пропущеними нагадуваннями, а нерозібране повідомлення йде без форматування."""
+    now = datetime.now(TIMEZONE)
+    database.add_reminder_to_db(1, now - timedelta(hours=2), "файл report_2024")
+    database.add_reminder_to_db(1, now - timedelta(hours=1), "змінна user_id і *зірка")
+    single = database.add_reminder_to_db(2, now - timedelta(seconds=5), "незакритий _курсив")
+    claimed = database.claim_due_reminders("worker-1", 60, 10)
+    bot = FakeBot({2: [BadRequest("Can't parse entities: can't find end of the entity starting at byte offset 40")]})
+    pipeline = delivery.DeliveryPipeline(bot, global_rate=10000, worker_id="worker-1")
+
+    assert asyncio.run(pipeline.deliver(claimed)) == []
+
+    catchup = next(text for chat_id, text in zip(bot.sent, bot.texts) if chat_id == 1)
+    assert "report\\_2024" in catchup and "user\\_id і \\*зірка" in catchup
+    assert delivery.format_reminder("незакритий _курсив", markdown=False) in bot.texts
+    assert database.get_all_pending_reminders_for_check() == []
+    with database._get_manager().reader() as conn:
+        assert conn.execute("SELECT status FROM reminders WHERE id = ?", (single,)).fetchone() == ("sent",)
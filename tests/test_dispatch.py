@@ -0,0 +1,145 @@
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import bot_database as database
+from bot_config import TIMEZONE
+from bot_delivery import DeliveryPipeline
+from bot_scheduler import ReminderScheduler
+
+
+class FakeBot:
+    """Замість Telegram дописує ID надісланих нагадувань у файл воркера."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await asyncio.sleep(0.005)
+        with open(self.path, "a") as log:
+            log.write(f"{chat_id}\n")
+
+
+def count_unsent() -> int:
+    with database._get_manager().reader() as conn:
+        return conn.execute("SELECT COUNT(*) FROM reminders WHERE status != 'sent'").fetchone()[0]
+
+def run_worker(db_name: str, worker_id: str, log_path: str, timeout: float = 20):
+    database.DB_NAME = db_name
+    database.init_db()
+
+    async def main():
+        pipeline = DeliveryPipeline(FakeBot(log_path), global_rate=100000, worker_id=worker_id)
+        scheduler = ReminderScheduler(pipeline.deliver, worker_id, lease_seconds=1, sweep_interval=0.1, batch_size=50)
+        await scheduler.start()
+        deadline = time.monotonic() + timeout
+        while count_unsent() and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        await scheduler.stop()
+
+    asyncio.run(main())
+    database.close_db()
+
+def crash_after_claim(db_name: str, worker_id: str):
+    database.DB_NAME = db_name
+    database.init_db()
+    database.claim_due_reminders(worker_id, 1, 100)
+    os._exit(0)
+
+def spawn(target, *args) -> multiprocessing.Process:
+    process = multiprocessing.get_context("fork").Process(target=target, args=args)
+    process.start()
+    return process
+
+def read_deliveries(paths: list) -> Counter:
+    delivered = Counter()
+    for path in paths:
+        if os.path.exists(path):
+            with open(path) as log:
+                delivered.update(int(line) for line in log)
+    return delivered
+
+
+def test_workers_share_database_without_duplicates(tmp_path):
+    """Кілька процесів-воркерів ділять одну базу, і кожне нагадування надсилається рівно один раз."""
+    past = datetime.now(TIMEZONE) - timedelta(minutes=1)
+    chat_ids = list(range(1, 601))
+    for chat_id in chat_ids:
+        database.add_reminder_to_db(chat_id, past, f"Для {chat_id}")
+    database.close_db()
+
+    paths = [str(tmp_path / f"worker-{i}.log") for i in range(3)]
+    workers = [spawn(run_worker, database.DB_NAME, f"worker-{i}", path) for i, path in enumerate(paths)]
+    for worker in workers:
+        worker.join(30)
+
+    delivered = read_deliveries(paths)
+    assert sorted(delivered) == chat_ids
+    assert set(delivered.values()) == {1}
+    assert sum(1 for path in paths if os.path.exists(path)) > 1
+    assert count_unsent() == 0
+
+def test_killed_worker_reminders_are_redelivered_once(tmp_path):
+    """Нагадування воркера, що впав після захоплення, після закінчення оренди надсилає інший воркер."""
+    past = datetime.now(TIMEZONE) - timedelta(minutes=1)
+    chat_ids = list(range(1, 51))
+    for chat_id in chat_ids:
+        database.add_reminder_to_db(chat_id, past, f"Для {chat_id}")
+    database.close_db()
+
+    crashed = spawn(crash_after_claim, database.DB_NAME, "crashed")
+    crashed.join(10)
+    with database._get_manager().reader() as conn:
+        owners = conn.execute("SELECT DISTINCT lease_owner FROM reminders").fetchall()
+    assert owners == [("crashed",)]
+    database.close_db()
+
+    path = str(tmp_path / "survivor.log")
+    survivor = spawn(run_worker, database.DB_NAME, "survivor", path)
+    survivor.join(30)
+
+    delivered = read_deliveries([path])
+    assert sorted(delivered) == chat_ids
+    assert set(delivered.values()) == {1}
+
+def test_lease_is_never_shorter_than_requested(monkeypatch):
+    """Оренда, взята наприкінці секунди, не повертається іншому воркеру на початку наступної."""
+    database.add_reminder_to_db(1, datetime.now(TIMEZONE) - timedelta(minutes=1), "Одне")
+    start = int(time.time()) + 0.99
+    monkeypatch.setattr(database.time, "time", lambda: start)
+    assert len(database.claim_due_reminders("worker-1", 1, 10)) == 1
+
+    monkeypatch.setattr(database.time, "time", lambda: start + 0.02)
+    assert database.claim_due_reminders("worker-2", 1, 10) == []
+    monkeypatch.setattr(database.time, "time", lambda: start + 1.02)
+    assert [row[0] for row in database.claim_due_reminders("worker-2", 1, 10)] == [1]
+
+def test_retries_back_off_and_stop_after_max_attempts(monkeypatch):
+    """Кожен повтор відкладається вдвічі довше, а після останньої спроби нагадування стає 'failed' і лишається видимим."""
+    rem_id = database.add_reminder_to_db(1, datetime.now(TIMEZONE) - timedelta(minutes=1), "Не доходить")
+    now = int(time.time())
+    delays = []
+    for attempt in range(3):
+        monkeypatch.setattr(database.time, "time", lambda: now)
+        assert [row[0] for row in database.claim_due_reminders("worker-1", 60, 10)] == [rem_id]
+        retries = database.schedule_retries([rem_id], "worker-1", 60, 3)
+        if attempt < 2:
+            [(retried_id, retry_at)] = retries
+            delays.append(retry_at - now)
+            now = retry_at + 1
+        else:
+            assert retries == []
+
+    assert delays == [60, 120]
+    monkeypatch.setattr(database.time, "time", lambda: now + 3600)
+    assert database.claim_due_reminders("worker-1", 60, 10) == []
+    rows, _ = database.get_pending_reminders_page(1)
+    assert [(row[0], row[4]) for row in rows] == [(rem_id, "failed")]
+    database.delete_reminder_from_db(rem_id)
+    assert database.get_pending_reminders_page(1) == ([], False)
@@ -0,0 +1,143 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import bot_database as database
+import bot_handlers as handlers
+from bot_config import TIMEZONE
+from tests.telegram_fakes import callback_update, document_update, message_update, run_session
+
+
+def add_reminders(chat_id: int, count: int, text: str = "Нагадування") -> list:
+    start = datetime.now(TIMEZONE) + timedelta(hours=1)
+    return [database.add_reminder_to_db(chat_id, start + timedelta(minutes=i), f"{text} {i}") for i in range(count)]
+
+def next_list_page(chat_id: int) -> str:
+    rows, _ = database.get_pending_reminders_page(chat_id)
+    return f"list:n:{len(rows)}:{rows[-1][1]}:{rows[-1][0]}"
+
+
+def test_list_paging_does_not_break_open_conversations():
+    """«Далі» під /list гортає список і не перериває відкриті /delete чи /set."""
+    chat_id = 30
+    ids = add_reminders(chat_id, database.PAGE_SIZE + 2)
+    page = next_list_page(chat_id)
+
+    replies = run_session([
+        message_update(1, chat_id, "/delete"),
+        callback_update(2, chat_id, page),
+        callback_update(3, chat_id, f"del_{ids[0]}"),
+        message_update(4, chat_id, "/set"),
+        callback_update(5, chat_id, page),
+        callback_update(6, chat_id, "1_min"),
+        message_update(7, chat_id, "Нове"),
+    ])
+
+    assert replies[1].startswith("Ваші активні нагадування") and "11." in replies[1]
+    assert replies[2] == "Нагадування успішно видалено!"
+    assert replies[4].startswith("Ваші активні нагадування")
+    assert replies[5] == "Чудово! Тепер введіть текст нагадування."
+    assert replies[6].startswith("Гаразд!")
+    assert len(database.get_pending_reminders(chat_id)) == len(ids)
+
+def test_list_page_fits_telegram_message_limit():
+    """Сторінка /list з довгими текстами не перевищує ліміт повідомлення, а решта доступна кнопкою «Далі»."""
+    chat_id = 32
+    add_reminders(chat_id, database.PAGE_SIZE, "д" * 450)
+    database.add_reminder_to_db(chat_id, datetime.now(TIMEZONE) + timedelta(days=1), "Останнє")
+
+    replies = run_session([message_update(1, chat_id, "/list"), callback_update(2, chat_id, next_list_page(chat_id))])
+
+    assert len(replies[0]) <= handlers.MAX_MESSAGE_LENGTH
+    assert "*10.*" in replies[0] and "…" in replies[0]
+    assert "*11.* Останнє" in replies[1]
+
+def test_fit_page_stops_before_message_limit():
+    """Записи, що не влазять у повідомлення, переносяться на наступну сторінку, але перший показується завжди."""
+    entries = ["x" * 1500 for _ in range(5)]
+
+    text, shown = handlers.fit_page("Заголовок\n", entries)
+
+    assert shown == 2 and len(text) <= handlers.MAX_MESSAGE_LENGTH
+    assert handlers.fit_page("", ["x" * 5000])[1] == 1
+
+def test_find_page_fits_telegram_message_limit():
+    """Результати /find з довгими текстами скорочуються і не перевищують ліміт повідомлення."""
+    chat_id = 33
+    add_reminders(chat_id, database.PAGE_SIZE + 1, "пошук " + "ф" * 450)
+
+    replies = run_session([message_update(1, chat_id, "/find пошук"), callback_update(2, chat_id, "findpage:n:10")])
+
+    assert len(replies[0]) <= handlers.MAX_MESSAGE_LENGTH
+    assert replies[0].count("…") == database.PAGE_SIZE
+    assert replies[1].splitlines()[2].startswith("11. пошук")
+
+def test_undelivered_reminder_is_marked_in_list():
+    """Нагадування, яке Telegram відхилив, лишається у /list з позначкою, щоб його можна було видалити."""
+    chat_id = 34
+    failed_id, pending_id = add_reminders(chat_id, 2)
+    database.mark_reminders_sent([], failed=[failed_id])
+
+    replies = run_session([message_update(1, chat_id, "/list")])
+
+    first, second = replies[0].split("\n\n")[1:3]
+    assert handlers.FAILED_MARK in first and handlers.FAILED_MARK not in second
+
+def test_markdown_in_reminder_text_is_escaped_in_pages():
+    """`_` і `*` з тексту нагадування не стають розміткою у /list і /find, а обрізання не розриває екранування."""
+    chat_id = 35
+    add_reminders(chat_id, 1, "user_name і *зірка")
+    add_reminders(chat_id, 1, "user" + "_" * 400)
+
+    replies = run_session([message_update(1, chat_id, "/list"), message_update(2, chat_id, "/find user")])
+
+    for reply in replies:
+        assert "user\\_name і \\*зірка" in reply
+        assert "\\…" not in reply
+    assert not any(handlers.markdown_text("a_b" * 10, limit).endswith("\\…") for limit in range(5, 15))
+
+def test_failed_download_ends_import_conversation():
+    """Помилка Telegram під час завантаження файлу завершує /import з поясненням, а не лишає розмову завислою."""
+    chat_id = 36
+
+    replies = run_session([
+        message_update(1, chat_id, "/import"),
+        document_update(2, chat_id, "reminders.csv"),
+        message_update(3, chat_id, "/import"),
+    ])
+
+    assert "Не вдалося завантажити файл" in replies[1]
+    assert replies[2] == replies[0]
+
+def test_find_pages_back_and_forth_without_gaps_when_trimmed(monkeypatch):
+    """Обрізані за довжиною сторінки /find гортаються вперед і назад без пропусків і повторів."""
+    chat_id = 37
+    add_reminders(chat_id, 25, "пошук " + "ф" * 60)
+    monkeypatch.setattr(handlers, "MAX_MESSAGE_LENGTH", 400)
+
+    def numbers(text):
+        return [int(line.split(".")[0]) for line in text.splitlines() if line[:1].isdigit()]
+
+    def navigate(markup, label):
+        return next((button.callback_data for button in markup.inline_keyboard[-2] if label in button.text), None)
+
+    async def walk(offset, backwards, label):
+        pages = []
+        while True:
+            text, markup = await handlers.render_find_page(chat_id, "пошук", offset, backwards)
+            pages.append(numbers(text))
+            data = navigate(markup, label)
+            if data is None:
+                return pages, markup
+            direction, offset = data.split(":")[1:]
+            offset, backwards = int(offset), direction == "p"
+
+    forward, _ = asyncio.run(walk(0, False, "Далі"))
+    back, _ = asyncio.run(walk(forward[-1][0] - 1, True, "Назад"))
+
+    assert len(forward) > 3 and all(len(page) < database.PAGE_SIZE for page in forward)
+    assert [n for page in forward for n in page] == list(range(1, 26))
+    assert [n for page in reversed(back) for n in page] == list(range(1, forward[-1][0]))
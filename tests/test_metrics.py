@@ -0,0 +1,101 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+from telegram.error import BadRequest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import bot_database as database
+import bot_delivery as delivery
+import bot_metrics as metrics
+from bot_config import TIMEZONE
+
+
+class FailingBot:
+    async def send_message(self, chat_id, text, **kwargs):
+        if chat_id == 2:
+            raise BadRequest("chat not found")
+
+
+def test_histogram_renders_cumulative_prometheus_buckets():
+    """Гістограма віддає кумулятивні кошики, суму й кількість у текстовому форматі Prometheus."""
+    histogram = metrics.Histogram("test_seconds", "Тест.", "function", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, "f")
+
+    lines = histogram.render()
+
+    assert 'test_seconds_bucket{function="f",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{function="f",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{function="f",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{function="f"} 4' in lines
+    counts, _ = histogram.snapshot()["f"]
+    assert histogram.quantile(counts, 0.5) == 1.0
+
+def test_db_calls_delivery_lag_and_failures_are_recorded():
+    """Асинхронні виклики бази, затримка доставки і помилки надсилання потрапляють у метрики."""
+    past = datetime.now(TIMEZONE) - timedelta(seconds=30)
+    for chat_id in (1, 2):
+        database.add_reminder_to_db(chat_id, past, "Тест")
+    lag_before = sum(sum(counts) for counts, _ in metrics.DELIVERY_LAG.snapshot().values())
+    failures_before = metrics.SEND_FAILURES.snapshot().get("BadRequest", 0)
+
+    async def main():
+        claimed = await database.claim_due("worker", 60, 10)
+        return await delivery.DeliveryPipeline(FailingBot(), global_rate=10000).deliver(claimed)
+
+    failed = asyncio.run(main())
+
+    assert failed == []
+    assert "claim_due_reminders" in metrics.DB_LATENCY.snapshot()
+    lag_counts, lag_total = metrics.DELIVERY_LAG.snapshot()[None]
+    assert sum(lag_counts) == lag_before + 1
+    assert lag_total >= 30
+    assert metrics.SEND_FAILURES.snapshot()["BadRequest"] == failures_before + 1
+    assert metrics.DISPATCH_QUEUE.value == 0
+
+def test_metrics_endpoint_serves_prometheus_text():
+    """HTTP-ендпоінт віддає /metrics і 404 для інших шляхів."""
+    async def fetch(port: int, path: str) -> bytes:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response
+
+    async def main():
+        server = await metrics.start_server("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await fetch(port, "/metrics"), await fetch(port, "/other")
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    found, missing = asyncio.run(main())
+
+    assert found.startswith(b"HTTP/1.1 200 OK")
+    assert b"# TYPE reminder_db_call_seconds histogram" in found
+    assert missing.startswith(b"HTTP/1.1 404")
+
+def test_cache_and_pipeline_metrics_are_exported():
+    """У /metrics є лічильники кешу, результати доставки та швидкість конвеєра."""
+    database.add_reminder_to_db(3, datetime.now(TIMEZONE) - timedelta(seconds=30), "Тест")
+    database.get_pending_reminders(3)
+    database.get_pending_reminders(3)
+    sent_before = metrics.DELIVERY_OUTCOMES.snapshot().get("sent", 0)
+
+    async def main():
+        claimed = await database.claim_due("worker", 60, 10)
+        return await delivery.DeliveryPipeline(FailingBot(), global_rate=10000).deliver(claimed)
+
+    asyncio.run(main())
+    lines = metrics.render().splitlines()
+
+    assert f"reminder_cache_hits_total {database.cache.hits}" in lines
+    assert "# TYPE reminder_cache_rows gauge" in lines
+    assert metrics.DELIVERY_OUTCOMES.snapshot()["sent"] == sent_before + 1
+    assert any(line.startswith('reminder_deliveries_total{outcome="sent"}') for line in lines)
+    assert metrics.DELIVERY_THROUGHPUT.value > 0
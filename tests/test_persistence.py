@@ -0,0 +1,49 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import bot_database as database
+from tests.telegram_fakes import callback_update, message_update, run_session
+
+
+def stored_user_data() -> list:
+    with database._get_manager().reader() as conn:
+        return conn.execute("SELECT user_id, key FROM user_data ORDER BY user_id, key").fetchall()
+
+def stored_conversations() -> list:
+    with database._get_manager().reader() as conn:
+        return conn.execute("SELECT name, conv_key FROM conversations").fetchall()
+
+
+def test_conversation_survives_restart():
+    """Розмова /set, перервана перезапуском, продовжується з того самого кроку."""
+    run_session([
+        message_update(1, 10, "/set"),
+        callback_update(2, 10, "custom_time"),
+        callback_update(3, 10, "in_minutes"),
+    ])
+    assert stored_conversations() == [("set_conv", "[10, 10]")]
+
+    replies = run_session([message_update(4, 10, "15"), message_update(5, 10, "Після деплою")])
+
+    assert replies[0] == "Чудово! Тепер введіть текст нагадування."
+    assert [row[2] for row in database.get_pending_reminders(10)] == ["Після деплою"]
+    assert stored_conversations() == []
+    assert stored_user_data() == []
+
+def test_user_data_is_stored_per_key_and_loaded_lazily():
+    """user_data зберігається рядком на ключ і читається з бази лише при першому оновленні користувача."""
+    run_session([message_update(1, 20, "/set"), callback_update(2, 20, "1_hour")])
+    run_session([message_update(3, 21, "/set"), callback_update(4, 21, "1_min")])
+    assert stored_user_data() == [(20, "reminder_time"), (21, "reminder_time")]
+
+    def check_nothing_loaded(application):
+        assert 20 not in application.user_data
+        assert application.persistence._loaded_users == set()
+
+    run_session([message_update(5, 20, "Текст")], inspect=check_nothing_loaded)
+
+    assert [row[2] for row in database.get_pending_reminders(20)] == ["Текст"]
+    assert database.get_pending_reminders(21) == []
+    assert stored_user_data() == [(21, "reminder_time")]
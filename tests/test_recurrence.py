@@ -0,0 +1,44 @@
+import os
+import sys
+from datetime import datetime
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import bot_recurrence as recurrence
+from bot_config import TIMEZONE
+
+
+def local_timestamp(*args) -> int:
+    return int(TIMEZONE.localize(datetime(*args)).timestamp())
+
+
+def test_parse_rule_normalizes_user_input():
+    """Перевіряємо розбір інтервалів, `weekdays` і cron-виразів."""
+    assert recurrence.parse_rule("30m") == "every:1800"
+    assert recurrence.parse_rule(" 2 H ") == "every:7200"
+    assert recurrence.parse_rule("weekdays 9:05") == "cron:5 9 * * 1-5"
+    assert recurrence.parse_rule("*/15 9-17 * * 1,3") == "cron:*/15 9-17 * * 1,3"
+    assert recurrence.parse_rule("every:600") == "every:600"
+    assert recurrence.parse_rule("cron:0 9 * * 1-5") == "cron:0 9 * * 1-5"
+    for bad in ("0m", "every day", "61 * * * *", "* * * *", "every:0", "every:-60", "every:1.5", "cron:30m"):
+        with pytest.raises(ValueError):
+            recurrence.parse_rule(bad)
+
+def test_interval_skips_occurrences_missed_during_downtime():
+    """Після простою інтервальне правило переходить до наступного майбутнього повтору, а не накопичує пропущені."""
+    previous = local_timestamp(2030, 1, 1, 9, 0)
+    assert recurrence.next_occurrence("every:3600", previous, previous) == previous + 3600
+    assert recurrence.next_occurrence("every:3600", previous, previous + 3 * 3600 + 5) == previous + 4 * 3600
+    for bad in ("every:0", "every:-60"):
+        with pytest.raises(ValueError):
+            recurrence.next_occurrence(bad, previous, previous)
+
+def test_cron_next_occurrence_in_local_timezone():
+    """Перевіряємо пошук наступного спрацювання cron у часовому поясі бота."""
+    friday_evening = local_timestamp(2030, 1, 4, 18, 0)
+    assert recurrence.next_occurrence("cron:0 9 * * 1-5", friday_evening, friday_evening) == local_timestamp(2030, 1, 7, 9, 0)
+    # Якщо обмежені і день місяця, і день тижня, cron спрацьовує за будь-яким з них.
+    assert recurrence.next_occurrence("cron:30 8 15 * 0", friday_evening, friday_evening) == local_timestamp(2030, 1, 6, 8, 30)
+    assert recurrence.describe_rule("cron:0 9 * * 1-5") == "щобудня о 09:00"
+    assert recurrence.describe_rule("every:172800") == "кожні 2 дн"
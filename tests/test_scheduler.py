@@ -0,0 +1,97 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import bot_database as database
+from bot_config import TIMEZONE
+from bot_scheduler import ReminderScheduler
+
+
+async def run_scheduler(scheduler: ReminderScheduler, until, timeout: float = 5):
+    await scheduler.start()
+    try:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not until() and loop.time() < deadline:
+            await asyncio.sleep(0.01)
+    finally:
+        await scheduler.stop()
+
+
+def test_scheduler_pages_in_reminders_beyond_window():
+    """Перевіряємо, що планувальник доставляє всі нагадування, навіть ті, що не влізли у вікно."""
+    start = datetime.now(TIMEZONE) - timedelta(minutes=10)
+    expected = [database.add_reminder_to_db(1, start + timedelta(seconds=i), f"#{i}") for i in range(7)]
+    delivered = []
+
+    async def deliver(due):
+        delivered.extend(row[0] for row in due)
+        return []
+
+    async def scenario():
+        scheduler = ReminderScheduler(deliver, "worker-1", window_size=3, batch_size=3)
+        await scheduler._fill_window()
+        assert len(scheduler) == 3
+        await run_scheduler(scheduler, lambda: len(delivered) == len(expected))
+
+    asyncio.run(scenario())
+
+    assert delivered == expected
+
+def test_scheduler_wakes_up_for_new_and_skips_removed_reminders():
+    """Перевіряємо, що нові нагадування будять планувальник, а видалені не надсилаються."""
+    delivered = []
+
+    async def deliver(due):
+        delivered.extend(row[0] for row in due)
+        return []
+
+    async def scenario():
+        scheduler = ReminderScheduler(deliver, "worker-1")
+        await scheduler.start()
+        now = datetime.now(TIMEZONE)
+        far_id = database.add_reminder_to_db(1, now + timedelta(days=1), "Далеке")
+        scheduler.add(far_id, now + timedelta(days=1))
+        await asyncio.sleep(0.05)
+        removed_id = database.add_reminder_to_db(1, now - timedelta(seconds=1), "Видалене")
+        due_id = database.add_reminder_to_db(1, now - timedelta(seconds=1), "Термінове")
+        scheduler.add(removed_id, now - timedelta(seconds=1))
+        database.delete_reminder_from_db(removed_id)
+        scheduler.remove(removed_id)
+        scheduler.add(due_id, now - timedelta(seconds=1))
+        for _ in range(100):
+            if delivered:
+                break
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+        return due_id
+
+    due_id = asyncio.run(scenario())
+
+    assert delivered == [due_id]
+
+def test_lease_is_renewed_while_batch_is_delivered():
+    """Пачка, доставка якої триває довше за оренду, не перехоплюється іншим воркером."""
+    rem_id = database.add_reminder_to_db(-1, datetime.now(TIMEZONE) - timedelta(seconds=1), "Груповий чат")
+    stolen = []
+
+    async def deliver(due):
+        for _ in range(3):
+            await asyncio.sleep(0.8)
+            stolen.extend(await database.claim_due("worker-2", 1, 10))
+        await database.mark_sent_many([row[0] for row in due], "worker-1")
+        return []
+
+    async def scenario():
+        scheduler = ReminderScheduler(deliver, "worker-1", lease_seconds=1)
+        await scheduler._dispatch_due()
+
+    asyncio.run(scenario())
+
+    assert stolen == []
+    assert database.get_pending_reminders(-1) == []
+    with database._get_manager().reader() as conn:
+        assert conn.execute("SELECT status FROM reminders WHERE id = ?", (rem_id,)).fetchone() == ("sent",)
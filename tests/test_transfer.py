@@ -0,0 +1,145 @@
+import asyncio
+import os
+import sys
+import time
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import bot_database as database
+import bot_metrics as metrics
+import bot_transfer as transfer
+
+
+def test_csv_import_accepts_valid_rows_and_reports_bad_ones(tmp_path):
+    """CSV з заголовком: коректні рядки імпортуються, помилкові - відхиляються з номером рядка."""
+    path = tmp_path / "reminders.csv"
+    path.write_text(
+        "reminder_time,reminder_text,recurrence\n"
+        "01.01.2099 10:00,Новий рік,\n"
+        "2099-02-01 09:30,Щобудня,weekdays 09:30\n"
+        "01.01.2000 10:00,Минуле,\n"
+        "не дата,Погано,\n"
+        "01.03.2099 10:00,,\n",
+        encoding="utf-8"
+    )
+
+    stats = transfer.import_file(1, str(path), "csv")
+
+    assert (stats.accepted, stats.rejected) == (2, 3)
+    assert [error.split(":")[0] for error in stats.errors] == ["рядок 4", "рядок 5", "рядок 6"]
+    rows = database.get_pending_reminders(1)
+    assert [row[2] for row in rows] == ["Новий рік", "Щобудня"]
+
+def test_csv_rules_in_stored_form_are_validated(tmp_path):
+    """Правила `every:`/`cron:` з CSV перевіряються так само, як введені вручну."""
+    path = tmp_path / "rules.csv"
+    path.write_text(
+        "01.01.2099 10:00,Щогодини,every:3600\n"
+        "01.01.2099 10:00,Від'ємний,every:-60\n"
+        "01.01.2099 10:00,Нульовий,every:0\n"
+        "01.01.2099 10:00,Не число,every:abc\n"
+        "01.01.2099 10:00,Поганий cron,cron:61 * * * *\n"
+        "01.01.2099 10:00,Щобудня,cron:0 9 * * 1-5\n",
+        encoding="utf-8"
+    )
+
+    stats = transfer.import_file(5, str(path), "csv")
+
+    assert (stats.accepted, stats.rejected) == (2, 4)
+    assert [error.split(":")[0] for error in stats.errors] == ["рядок 2", "рядок 3", "рядок 4", "рядок 5"]
+    rules = [row[3] for row in database.iter_pending_reminders(5)]
+    assert rules == ["every:3600", "cron:0 9 * * 1-5"]
+
+def test_cp1251_csv_is_imported_and_undecodable_file_is_reported(tmp_path):
+    """CSV з Excel у cp1251 імпортується, а файл, який не читається жодним кодуванням, дає зрозумілу помилку."""
+    path = tmp_path / "excel.csv"
+    path.write_bytes("01.01.2099 10:00,Привіт з Excel,\n".encode("cp1251"))
+
+    stats = transfer.import_file(6, str(path), "csv")
+
+    assert (stats.accepted, stats.rejected) == (1, 0)
+    assert [row[2] for row in database.iter_pending_reminders(6)] == ["Привіт з Excel"]
+
+    path.write_bytes(b"01.01.2099 10:00,\x98\xff\n")
+    with pytest.raises(ValueError, match="кодування"):
+        transfer.import_file(7, str(path), "csv")
+    assert list(database.iter_pending_reminders(7)) == []
+
+def test_utf8_file_with_stray_byte_is_rejected_not_imported_as_cp1251(tmp_path):
+    """UTF-8 з одним пошкодженим байтом не перетворюється на кракозябри cp1251, а відхиляється цілком."""
+    path = tmp_path / "broken.csv"
+    lines = [f"01.01.2099 10:00,Текст {i},\n".encode("utf-8") for i in range(100)]
+    lines[50] = b"01.01.2099 10:00,\xff\n"
+    path.write_bytes(b"".join(lines))
+
+    with pytest.raises(ValueError, match="рядок 51"):
+        transfer.import_file(8, str(path), "csv")
+
+    assert list(database.iter_pending_reminders(8)) == []
+
+def test_ics_import_handles_folding_timezones_and_rrule(tmp_path):
+    """iCalendar: згорнуті рядки, UTC/TZID, прості RRULE; непідтримувані правила відхиляються."""
+    path = tmp_path / "calendar.ics"
+    path.write_text(
+        "BEGIN:VCALENDAR\r\n"
+        "BEGIN:VEVENT\r\n"
+        "DTSTART:20990101T080000Z\r\n"
+        "SUMMARY:Довгий\r\n"
+        "  опис\\, з комою\r\n"
+        "END:VEVENT\r\n"
+        "BEGIN:VEVENT\r\n"
+        "DTSTART;TZID=Europe/Kyiv:20000101T090000\r\n"
+        "RRULE:FREQ=DAILY;INTERVAL=2\r\n"
+        "SUMMARY:Кожні два дні\r\n"
+        "END:VEVENT\r\n"
+        "BEGIN:VEVENT\r\n"
+        "DTSTART:20990101T090000\r\n"
+        "RRULE:FREQ=WEEKLY;BYDAY=MO\r\n"
+        "SUMMARY:Щотижня\r\n"
+        "END:VEVENT\r\n"
+        "END:VCALENDAR\r\n",
+        encoding="utf-8"
+    )
+
+    stats = transfer.import_file(2, str(path), "ics")
+
+    assert (stats.accepted, stats.rejected) == (2, 1)
+    with database._get_manager().reader() as conn:
+        rows = conn.execute(
+            "SELECT reminder_time, reminder_text, recurrence FROM reminders WHERE chat_id = 2 ORDER BY id"
+        ).fetchall()
+    assert rows[0] == (4070937600, "Довгий опис, з комою", None)
+    assert rows[1][1:] == ("Кожні два дні", "every:172800")
+    assert rows[1][0] > time.time()
+
+def test_large_csv_import_and_export_round_trip(tmp_path):
+    """Великий файл імпортується пакетами, а експорт відтворює ті самі нагадування."""
+    source = tmp_path / "big.csv"
+    with open(source, "w", encoding="utf-8") as target:
+        for i in range(5000):
+            target.write(f"2099-01-01 {i // 60 % 24:02d}:{i % 60:02d},Нагадування {i}\n")
+
+    stats = transfer.import_file(3, str(source), "csv")
+    assert stats.accepted == 5000
+
+    exported = tmp_path / "export.csv"
+    assert transfer.export_file(3, str(exported)) == 5000
+    stats = transfer.import_file(4, str(exported), "csv")
+
+    assert (stats.accepted, stats.rejected) == (5000, 0)
+    original = [row[1:] for row in database.iter_pending_reminders(3)]
+    copied = [row[1:] for row in database.iter_pending_reminders(4)]
+    assert copied == original
+
+def test_async_import_and_export_run_on_database_executor(tmp_path):
+    """Асинхронні імпорт і експорт ідуть через виконавця бази і потрапляють у метрики затримок."""
+    source = tmp_path / "small.csv"
+    source.write_text("01.01.2099 10:00,Через виконавця,\n", encoding="utf-8")
+
+    async def scenario():
+        stats = await transfer.import_reminders(9, str(source), "csv")
+        return stats.accepted, await transfer.export_reminders(9, str(tmp_path / "out.csv"))
+
+    assert asyncio.run(scenario()) == (1, 1)
+    assert {"import_file", "export_file"} <= set(metrics.DB_LATENCY.snapshot())
@@ -0,0 +1,180 @@
+import asyncio
+import importlib
+import os
+import socket
+import sys
+from datetime import datetime, timedelta
+import pytest
+from telegram import Update
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import bot_database as database
+import bot_handlers as handlers
+from bot_config import TIMEZONE
+from bot_main import build_application
+from bot_updates import ChatOrderedUpdateProcessor
+from tests.telegram_fakes import FakeRequest, callback_update, message_update
+
+
+def conversation_updates(chat_ids: list) -> list:
+    """Для кожного чату: /set → «На хвилину» → текст; оновлення чатів перемішані між собою."""
+    updates = []
+    for step in range(3):
+        for chat_id in chat_ids:
+            update_id = len(updates) + 1
+            if step == 0:
+                updates.append(message_update(update_id, chat_id, "/set"))
+            elif step == 1:
+                updates.append(callback_update(update_id, chat_id, "1_min"))
+            else:
+                updates.append(message_update(update_id, chat_id, f"Текст {chat_id}"))
+    return updates
+
+def assert_conversations_completed(chat_ids: list):
+    for chat_id in chat_ids:
+        assert [row[2] for row in database.get_pending_reminders(chat_id)] == [f"Текст {chat_id}"]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_chat_ordered_processor_serializes_chat_and_parallelizes_chats():
+    """Оновлення одного чату виконуються по черзі, а різних чатів - одночасно."""
+    processor = ChatOrderedUpdateProcessor(8)
+    events = []
+    running = []
+
+    async def handle(chat_id: int, seq: int):
+        running.append(chat_id)
+        events.append((chat_id, seq, max(running.count(c) for c in running), len(running)))
+        await asyncio.sleep(0.01)
+        running.remove(chat_id)
+
+    async def main():
+        tasks = []
+        for seq in range(5):
+            for chat_id in (1, 2, 3):
+                update = Update.de_json(message_update(seq * 3 + chat_id, chat_id, "x"), None)
+                tasks.append(asyncio.create_task(processor.process_update(update, handle(chat_id, seq))))
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+
+    for chat_id in (1, 2, 3):
+        assert [seq for c, seq, _, _ in events if c == chat_id] == list(range(5))
+    assert max(same_chat for _, _, same_chat, _ in events) == 1
+    assert max(total for _, _, _, total in events) == 3
+    assert processor._locks == {}
+
+def test_conversations_stay_ordered_with_concurrent_updates():
+    """Перемішані оновлення багатьох чатів через справжній Application доводять кожну розмову до кінця."""
+    chat_ids = list(range(100, 140))
+    request = FakeRequest()
+    application = build_application("123:TEST", request=request, concurrent_updates=16)
+
+    async def main():
+        async with application:
+            await application.start()
+            for payload in conversation_updates(chat_ids):
+                await application.update_queue.put(Update.de_json(payload, application.bot))
+            while application.update_queue.qsize() or len(request.sent) < 3 * len(chat_ids):
+                await asyncio.sleep(0.01)
+            await application.stop()
+
+    asyncio.run(main())
+
+    assert_conversations_completed(chat_ids)
+
+def test_webhook_accepts_posted_updates_locally():
+    """Записані оновлення, надіслані POST-запитом на локальний вебхук, обробляються без Telegram."""
+    pytest.importorskip("tornado")
+    import httpx
+
+    chat_ids = [201, 202, 203]
+    request = FakeRequest()
+    application = build_application("123:TEST", request=request)
+    port = free_port()
+
+    async def main():
+        async with application:
+            await application.updater.start_webhook(
+                listen="127.0.0.1", port=port, url_path="telegram", secret_token="secret"
+            )
+            await application.start()
+            async with httpx.AsyncClient() as client:
+                url = f"http://127.0.0.1:{port}/telegram"
+                rejected = await client.post(url, json=message_update(999, 201, "/start"))
+                assert rejected.status_code == 403
+                for payload in conversation_updates(chat_ids):
+                    response = await client.post(
+                        url, json=payload, headers={"X-Telegram-Bot-Api-Secret-Token": "secret"}
+                    )
+                    assert response.status_code == 200
+            while len(request.sent) < 3 * len(chat_ids):
+                await asyncio.sleep(0.01)
+            await application.updater.stop()
+            await application.stop()
+
+    asyncio.run(main())
+
+    assert_conversations_completed(chat_ids)
+
+def archived_count() -> int:
+    with database._get_manager().reader() as conn:
+        return conn.execute("SELECT COUNT(*) FROM reminders_archive").fetchone()[0]
+
+def test_compaction_is_scheduled_with_or_without_job_queue():
+    """Без JobQueue компакція працює окремою asyncio-задачею, яку зупиняє post_shutdown."""
+    old_time = datetime.now(TIMEZONE) - timedelta(days=400)
+    database.mark_reminders_sent([database.add_reminder_to_db(1, old_time, "Старе") for _ in range(3)])
+    application = build_application("123:TEST", request=FakeRequest())
+
+    async def main():
+        async with application:
+            handlers.schedule_compaction(application)
+            if application.job_queue is not None:
+                assert [job.callback for job in application.job_queue.jobs()] == [handlers.compact_reminders]
+                return
+            task = application.bot_data[handlers.COMPACTION_TASK_KEY]
+            assert not task.done()
+            await handlers.post_shutdown(application)
+            await asyncio.sleep(0)
+            assert task.cancelled()
+
+            task = asyncio.create_task(handlers.run_compaction(3600, first=0))
+            for _ in range(100):
+                if archived_count() == 3:
+                    break
+                await asyncio.sleep(0.01)
+            task.cancel()
+            assert archived_count() == 3
+
+    asyncio.run(main())
+
+@pytest.mark.parametrize("env", [
+    {"UPDATE_MODE": "webhook", "WEBHOOK_SECRET_TOKEN": "secret"},
+    {"UPDATE_MODE": "webhook", "WEBHOOK_URL": "http://bot.example.com/telegram", "WEBHOOK_SECRET_TOKEN": "secret"},
+    {"UPDATE_MODE": "webhook", "WEBHOOK_URL": "https://bot.example.com/telegram"},
+    {"UPDATE_MODE": "webhook", "WEBHOOK_URL": "https://bot.example.com/telegram", "WEBHOOK_SECRET_TOKEN": "не латиниця"},
+    {"UPDATE_MODE": "pooling"},
+])
+def test_webhook_mode_requires_valid_url_and_secret(monkeypatch, env):
+    """Режим webhook без https-адреси чи коректного секрету не запускається, а падає з поясненням."""
+    import bot_config
+    for name in ("UPDATE_MODE", "WEBHOOK_URL", "WEBHOOK_SECRET_TOKEN"):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    try:
+        with pytest.raises(ValueError):
+            importlib.reload(bot_config)
+        monkeypatch.setenv("WEBHOOK_URL", "https://bot.example.com/telegram")
+        monkeypatch.setenv("WEBHOOK_SECRET_TOKEN", "s3cret_token-1")
+        if env["UPDATE_MODE"] == "webhook":
+            assert importlib.reload(bot_config).UPDATE_MODE == "webhook"
+    finally:
+        monkeypatch.undo()
+        importlib.reload(bot_config)